@@ -33,6 +33,7 @@ setup(
         'plyer',
         'cpuinfo',
         'colorama',
+        'numpy',
     ],
     license=open('LICENSE').read(),
     entry_points={
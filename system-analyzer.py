@@ -1,30 +1,90 @@
+import argparse
+import array
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import functools
+import getpass
+import heapq
+import http.client
+import http.server
+import math
+import mmap
+import operator
 import os
+import signal
+import socket
+import statistics
+import struct
 import subprocess
 import sys
-import requests
+import threading
+import urllib.parse
+import zlib
 import platform
+import queue
+import re
 import psutil
 import time
 import logging
-from tabulate import tabulate
 from colorama import Fore, Style
-from plyer import notification
 import json
-import speedtest
-import cpuinfo
 
-# Setup logging
-logging.basicConfig(filename='system_analyzer.log', level=logging.INFO,
-                    format='%(asctime)s:%(levelname)s:%(message)s')
+# requests, tabulate, plyer, speedtest and cpuinfo are imported by the
+# functions that need them; together they dominate start-up time.
 
-logging.info(f"System Analyzer started.")
-logging.info(f"Analyzer started at: {time.ctime()}")
-logging.info(f"Analyzer PID: {os.getpid()}")
-logging.info(f"User: {os.getlogin()}")
-logging.info(f"Platform: {platform.platform()}")
+
+def get_user():
+    # os.getlogin() needs a controlling terminal, which cron and daemons lack.
+    try:
+        return os.getlogin()
+    except OSError:
+        return getpass.getuser()
+
+
+def setup_logging():
+    logging.basicConfig(filename='system_analyzer.log', level=logging.INFO,
+                        format='%(asctime)s:%(levelname)s:%(message)s')
+
+    logging.info(f"System Analyzer started.")
+    logging.info(f"Analyzer started at: {time.ctime()}")
+    logging.info(f"Analyzer PID: {os.getpid()}")
+    logging.info(f"User: {get_user()}")
+    logging.info(f"Platform: {platform.platform()}")
+
+
+def cache_path(name):
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'system-analyzer', f"{name}.json")
+
+
+def read_cache(name):
+    try:
+        with open(cache_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache(name, data):
+    path = cache_path(name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(data, f)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logging.warning(f"Unable to write cache {path}: {e}")
 
 
 def is_raspberry_pi():
+    return get_static_info()['Is Raspberry Pi']
+
+
+def detect_raspberry_pi():
     try:
         with open('/proc/cpuinfo', 'r') as f:
             cpuinfo = f.read().lower()
@@ -33,60 +93,268 @@ def is_raspberry_pi():
         return False
 
 
+_static_info = None
+
+
+def get_static_info(use_cache=True):
+    # Facts that cannot change until the next reboot are cached on disk,
+    # keyed by boot time, so cpuinfo's subprocess only runs once per boot.
+    global _static_info
+    if _static_info is not None and use_cache:
+        return _static_info
+    boot_time = psutil.boot_time()
+    cached = read_cache('static_info') if use_cache else None
+    # psutil derives boot time from uptime on some platforms, so allow jitter.
+    if cached and abs(cached.get('boot_time', 0) - boot_time) <= 1:
+        _static_info = cached['info']
+        return _static_info
+
+    import cpuinfo
+    _static_info = {
+        'OS': platform.system(),
+        'OS Version': platform.version(),
+        'Machine': platform.machine(),
+        'Processor': cpuinfo.get_cpu_info().get('brand_raw', 'Unknown Processor'),
+        'Is Raspberry Pi': detect_raspberry_pi()
+    }
+    write_cache('static_info', {'boot_time': boot_time, 'info': _static_info})
+    return _static_info
+
+
+def normalize_url(url):
+    return url if url.startswith("http") else f"http://{url}"
+
+
 def measure_system_response(url):
+    import requests
     try:
-        response = requests.get(url if url.startswith(
-            "http") else f"http://{url}", timeout=15)
+        response = requests.get(normalize_url(url), timeout=15)
         return response.elapsed.total_seconds() * 1000
     except requests.RequestException as e:
         logging.error(f"Error measuring system response: {e}")
         return None
 
 
-def check_os_updates():
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize_latencies(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': values[-1]
+    }
+
+
+def failed_probes(count, error):
+    return [{'connect_ms': None, 'ttfb_ms': None, 'total_ms': None, 'error': error}
+            for _ in range(count)]
+
+
+def probe_connection(url, count, timeout, max_time=None):
+    # Runs `count` sequential requests over one keep-alive connection. The
+    # connection is only re-opened after an error or when the server closes it,
+    # so connect time is recorded separately from time-to-first-byte. A failed
+    # connect or a timeout ends the worker, and so does `max_time`: the
+    # remaining requests are counted as errors instead of each paying another
+    # full timeout against a dead or silent host.
+    parts = urllib.parse.urlsplit(url)
+    connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                        else http.client.HTTPConnection)
+    path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    deadline = time.monotonic() + max_time if max_time else float('inf')
+    connection = None
+    results = []
+    for _ in range(count):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            results.extend(failed_probes(count - len(results), "probe time limit exceeded"))
+            break
+        result = {'connect_ms': None, 'ttfb_ms': None, 'total_ms': None, 'error': None}
+        started = time.perf_counter()
+        if connection is None:
+            try:
+                connection = connection_class(parts.hostname, parts.port,
+                                              timeout=min(timeout, remaining))
+                connection.connect()
+            except (OSError, http.client.HTTPException) as e:
+                if connection is not None:
+                    connection.close()
+                results.extend(failed_probes(count - len(results), str(e) or type(e).__name__))
+                return results
+            result['connect_ms'] = (time.perf_counter() - started) * 1000
+        else:
+            connection.sock.settimeout(min(timeout, remaining))
+        try:
+            sent = time.perf_counter()
+            connection.request('GET', path, headers={'Connection': 'keep-alive'})
+            response = connection.getresponse()
+            result['ttfb_ms'] = (time.perf_counter() - sent) * 1000
+            response.read()
+            result['total_ms'] = (time.perf_counter() - started) * 1000
+            if response.status >= 400:
+                result['error'] = f"HTTP {response.status}"
+            if response.will_close:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException) as e:
+            result['error'] = str(e) or type(e).__name__
+            connection.close()
+            connection = None
+            if isinstance(e, socket.timeout):
+                results.append(result)
+                results.extend(failed_probes(count - len(results), result['error']))
+                return results
+        results.append(result)
+    if connection is not None:
+        connection.close()
+    return results
+
+
+def summarize_probe(results):
+    errors = [r['error'] for r in results if r['error']]
+    return {
+        'requests': len(results),
+        'errors': len(errors),
+        'error_rate': len(errors) / len(results) if results else 0.0,
+        'connect_ms': summarize_latencies([r['connect_ms'] for r in results if r['connect_ms'] is not None]),
+        'ttfb_ms': summarize_latencies([r['ttfb_ms'] for r in results if r['ttfb_ms'] is not None]),
+        'total_ms': summarize_latencies([r['total_ms'] for r in results if r['total_ms'] is not None]),
+        'last_error': errors[-1] if errors else None
+    }
+
+
+def probe_targets(targets, requests_per_target=10, concurrency=4, timeout=5, max_workers=256,
+                  max_time=10):
+    # Each target gets `concurrency` connections sharing its request budget.
+    # Every connection is bounded by `timeout` per operation and `max_time`
+    # overall, so a slow host only holds its own workers. Jobs are submitted
+    # round-robin across targets, so when there are more jobs than workers
+    # every target's first connection starts in the first wave.
+    targets = [normalize_url(target) for target in targets]
+    results = {url: [] for url in targets}
+    connections = max(1, min(concurrency, requests_per_target))
+    share, extra = divmod(requests_per_target, connections)
+    jobs = [(url, share + (1 if i < extra else 0))
+            for i in range(connections) for url in targets]
+    if not jobs:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        futures = {pool.submit(probe_connection, url, count, timeout, max_time): (url, count)
+                   for url, count in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            url, count = futures[future]
+            try:
+                results[url].extend(future.result())
+            except Exception as e:
+                # A malformed target (e.g. a non-numeric port) is reported as
+                # that target's error rather than aborting the whole run.
+                results[url].extend(failed_probes(count, str(e) or type(e).__name__))
+    return {url: summarize_probe(samples) for url, samples in results.items()}
+
+
+def read_targets(filename):
+    with open(filename) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def present_probe_results(results):
+    def fmt(stats, key):
+        return f"{stats[key]:.2f}" if stats else "N/A"
+
+    headers = ["Target", "Requests", "Error Rate", "Connect p50", "Connect p99",
+               "TTFB p50", "TTFB p90", "TTFB p99", "TTFB max"]
+    data = []
+    for url, summary in results.items():
+        data.append([
+            url,
+            summary['requests'],
+            f"{summary['error_rate'] * 100:.1f}%",
+            fmt(summary['connect_ms'], 'p50'),
+            fmt(summary['connect_ms'], 'p99'),
+            fmt(summary['ttfb_ms'], 'p50'),
+            fmt(summary['ttfb_ms'], 'p90'),
+            fmt(summary['ttfb_ms'], 'p99'),
+            fmt(summary['ttfb_ms'], 'max')
+        ])
+    from tabulate import tabulate
+    print(tabulate(data, headers, tablefmt="grid"))
+    print("Latencies in ms.")
+
+
+def get_update_commands():
     system = platform.system()
+    if system == 'Linux':
+        if is_raspberry_pi():
+            return ("Raspberry Pi detected. Checking for updates using apt.",
+                    ['apt', 'update', '-qq'], ['apt', 'upgrade', '-y'])
+        return ("Linux detected. Checking for updates using apt.",
+                ['apt-get', 'update', '-qq'], ['apt-get', 'upgrade', '-y'])
+    elif system == 'Darwin':
+        return ("MacOS detected. Checking for updates using softwareupdate.",
+                ['softwareupdate', '-l'], ['softwareupdate', '-i', '-a'])
+    elif system == 'Windows':
+        return ("Windows detected. Checking for updates using Windows Update.",
+                ['powershell', '-Command', 'Get-WindowsUpdate'],
+                ['powershell', '-Command', 'Install-WindowsUpdate', '-AcceptAll'])
+    return None
+
+
+def prompt_os_upgrade(upgrade_command):
+    # Cron jobs and health checks have no one to answer the prompt.
+    update_choice = input(
+        "Do you want to update now? (yes/no): ").strip().lower() if sys.stdin.isatty() else 'no'
+    if update_choice == 'yes':
+        upgrade_result = subprocess.run(
+            upgrade_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if upgrade_result.returncode == 0:
+            print("Updates were successfully installed.")
+            write_cache('os_updates', {})
+        else:
+            print("Error installing updates:")
+            print(upgrade_result.stderr)
+    else:
+        print("No updates were installed.")
+
+
+def check_os_updates(ttl=0, interactive=True, timeout=None):
     try:
-        if system == 'Linux':
-            if is_raspberry_pi():
-                print("Raspberry Pi detected. Checking for updates using apt.")
-                if os.geteuid() != 0:
-                    print(
-                        "This script requires superuser privileges to check for updates.")
-                    return False
-                update_command = ['apt', 'update', '-qq']
-                upgrade_command = ['apt', 'upgrade', '-y']
-            else:
-                print("Linux detected. Checking for updates using apt.")
-                update_command = ['apt-get', 'update', '-qq']
-                upgrade_command = ['apt-get', 'upgrade', '-y']
-
-        elif system == 'Darwin':
-            print("MacOS detected. Checking for updates using softwareupdate.")
-            update_command = ['softwareupdate', '-l']
-            upgrade_command = ['softwareupdate', '-i', '-a']
-
-        elif system == 'Windows':
-            print("Windows detected. Checking for updates using Windows Update.")
-            update_command = ['powershell', '-Command', 'Get-WindowsUpdate']
-            upgrade_command = ['powershell', '-Command',
-                               'Install-WindowsUpdate', '-AcceptAll']
-
-        update_result = subprocess.run(
-            update_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if update_result.returncode == 0:
+        commands = get_update_commands()
+        if commands is None:
+            print(f"Checking for updates is not supported on {platform.system()}.")
+            return False
+        message, update_command, upgrade_command = commands
+        print(message)
+        if is_raspberry_pi() and os.geteuid() != 0:
+            print(
+                "This script requires superuser privileges to check for updates.")
+            return False
+
+        cached = read_cache('os_updates') if ttl > 0 else None
+        if (cached and cached.get('command') == update_command
+                and 0 <= time.time() - cached.get('checked_at', 0) < ttl):
+            returncode = cached['returncode']
+        else:
+            update_result = subprocess.run(
+                update_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                timeout=timeout)
+            returncode = update_result.returncode
+            write_cache('os_updates', {'command': update_command, 'checked_at': time.time(),
+                                       'returncode': returncode})
+        if returncode == 0:
             print("Updates are available for the operating system.")
-            update_choice = input(
-                "Do you want to update now? (yes/no): ").strip().lower()
-            if update_choice == 'yes':
-                upgrade_result = subprocess.run(
-                    upgrade_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                if upgrade_result.returncode == 0:
-                    print("Updates were successfully installed.")
-                else:
-                    print("Error installing updates:")
-                    print(upgrade_result.stderr)
-            else:
-                print("No updates were installed.")
+            if interactive:
+                prompt_os_upgrade(upgrade_command)
             return True
         else:
             print("The operating system is up to date.")
@@ -116,25 +384,257 @@ def get_network_information():
     }
 
 
+PROCESS_ATTRS = ['create_time', 'cpu_times', 'memory_info', 'io_counters',
+                 'num_fds' if psutil.POSIX else 'num_handles']
+PROCESS_METRICS = ('cpu_percent', 'rss', 'io_bytes_per_sec', 'open_files')
+_process_counters = {}
+
+
+def get_top_processes(n=5):
+    # CPU and IO are rates against the previous sweep, keyed by PID and
+    # create time so a reused PID starts fresh. Processes not seen before fall
+    # back to their lifetime average. Exited PIDs drop out because the cache is
+    # rebuilt from the live process list on every sweep.
+    global _process_counters
+    now = time.monotonic()
+    wall_time = time.time()
+    counters = {}
+    processes = []
+    for proc in psutil.process_iter(PROCESS_ATTRS, ad_value=None):
+        info = proc.info
+        create_time = info['create_time'] or 0.0
+        cpu_times = info['cpu_times']
+        cpu_seconds = cpu_times.user + cpu_times.system if cpu_times else 0.0
+        io = info['io_counters']
+        io_bytes = io.read_bytes + io.write_bytes if io else None
+        previous = _process_counters.get(proc.pid)
+        if previous and previous[0] == create_time and now > previous[1]:
+            elapsed = now - previous[1]
+            cpu_percent = (cpu_seconds - previous[2]) / elapsed * 100
+            io_rate = ((io_bytes - previous[3]) / elapsed
+                       if io_bytes is not None and previous[3] is not None else None)
+        else:
+            lifetime = max(wall_time - create_time, 1e-3)
+            cpu_percent = cpu_seconds / lifetime * 100
+            io_rate = io_bytes / lifetime if io_bytes is not None else None
+        counters[proc.pid] = (create_time, now, cpu_seconds, io_bytes)
+        memory = info['memory_info']
+        processes.append({
+            'pid': proc.pid,
+            'process': proc,
+            'cpu_percent': cpu_percent,
+            'rss': memory.rss if memory else None,
+            'io_bytes_per_sec': io_rate,
+            'open_files': info[PROCESS_ATTRS[-1]]
+        })
+    _process_counters = counters
+    # nlargest keeps an n-sized heap instead of sorting every process.
+    top_processes = {metric: heapq.nlargest(n, (p for p in processes if p[metric] is not None),
+                                            key=operator.itemgetter(metric))
+                     for metric in PROCESS_METRICS}
+    # Names are the most expensive attribute, so only look them up for the winners.
+    names = {}
+    for entries in top_processes.values():
+        for entry in entries:
+            if entry['pid'] not in names:
+                try:
+                    names[entry['pid']] = entry['process'].name()
+                except psutil.Error:
+                    names[entry['pid']] = None
+    return {metric: [{'pid': entry['pid'], 'name': names[entry['pid']],
+                      **{key: entry[key] for key in PROCESS_METRICS}} for entry in entries]
+            for metric, entries in top_processes.items()}
+
+
+PROCESS_FORMATS = {
+    'cpu_percent': ("CPU", lambda value: f"{value:.1f}%"),
+    'rss': ("RSS", lambda value: f"{value / (1024 * 1024):.1f} MB"),
+    'io_bytes_per_sec': ("IO", lambda value: f"{value / 1024:.1f} KB/s"),
+    'open_files': ("Open Files", lambda value: f"{value}")
+}
+
+
+def describe_top_processes(processes, metric, limit=3):
+    fmt = PROCESS_FORMATS[metric][1]
+    return ", ".join(f"{process['name']} ({process['pid']}) {fmt(process[metric])}"
+                     for process in processes[:limit])
+
+
+def present_top_processes(top_processes, lifetime=False):
+    headers = ["Metric", "PID", "Name", "Value"]
+    data = []
+    for metric, processes in top_processes.items():
+        label, fmt = PROCESS_FORMATS[metric]
+        for process in processes:
+            data.append([label, process['pid'], process['name'], fmt(process[metric])])
+    from tabulate import tabulate
+    print(tabulate(data, headers, tablefmt="grid"))
+    if lifetime:
+        print("CPU and IO are lifetime averages.")
+
+
+NIC_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+              'errin', 'errout', 'dropin', 'dropout')
+DISK_FIELDS = ('read_count', 'write_count', 'read_bytes', 'write_bytes')
+DISK_RATE_NAMES = ('read_iops', 'write_iops', 'read_bytes_per_sec', 'write_bytes_per_sec')
+IDLE_CPU_FIELDS = ('idle', 'iowait')
+# On Linux guest time is already counted in user and nice.
+GUEST_CPU_FIELDS = ('guest', 'guest_nice')
+
+
+class CounterTracker:
+    # Keeps the previous counter matrix per device group and turns the next
+    # one into deltas with array arithmetic, so the per-tick cost barely grows
+    # with the number of cores, disks or NICs.
+    def __init__(self):
+        self.previous = {}
+
+    def deltas(self, group, counters, now, clamp=False):
+        import numpy as np
+        names = tuple(counters)
+        values = np.array([tuple(counters[name]) for name in names], dtype=np.float64)
+        previous = self.previous.get(group)
+        self.previous[group] = (now, names, values)
+        if previous is None or not names:
+            return None
+        previous_time, previous_names, previous_values = previous
+        elapsed = now - previous_time
+        if elapsed <= 0:
+            return None
+        if names != previous_names:
+            # Devices that appeared have no baseline yet; vanished ones are dropped.
+            index = {name: i for i, name in enumerate(previous_names)}
+            rows = [i for i, name in enumerate(names) if name in index]
+            previous_values = previous_values[[index[names[i]] for i in rows]]
+            values = values[rows]
+            names = tuple(names[i] for i in rows)
+            if not names:
+                return None
+        delta = values - previous_values
+        # psutil already compensates 32-bit NIC and disk counter wraps
+        # (nowrap=True), so a decrease is a reset and has no meaningful rate.
+        # CPU times can step back slightly between reads; those clamp to zero.
+        delta = np.where(delta < 0, 0.0 if clamp else np.nan, delta)
+        return names, delta, elapsed
+
+
+def get_filesystem_usage():
+    usage = {}
+    for partition in psutil.disk_partitions(all=False):
+        try:
+            usage[partition.mountpoint] = psutil.disk_usage(partition.mountpoint).percent
+        except OSError:
+            continue
+    return usage
+
+
+def get_device_rates(tracker):
+    import numpy as np
+
+    def to_dict(names, keys, matrix):
+        return {name: dict(zip(keys, row)) for name, row in zip(names, matrix.tolist())}
+
+    now = time.monotonic()
+    rates = {'cpu_cores': None, 'nics': {}, 'disks': {}, 'filesystems': get_filesystem_usage()}
+
+    cpu_times = psutil.cpu_times(percpu=True)
+    fields = cpu_times[0]._fields
+    idle_columns = [i for i, field in enumerate(fields) if field in IDLE_CPU_FIELDS]
+    guest_columns = [i for i, field in enumerate(fields) if field in GUEST_CPU_FIELDS]
+    result = tracker.deltas('cpu', dict(enumerate(cpu_times)), now, clamp=True)
+    if result:
+        _, delta, _ = result
+        total = delta.sum(axis=1) - delta[:, guest_columns].sum(axis=1)
+        idle = delta[:, idle_columns].sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            busy = np.where(total > 0, (1 - idle / total) * 100, 0.0)
+        rates['cpu_cores'] = np.clip(busy, 0, 100).round(1).tolist()
+
+    nics = psutil.net_io_counters(pernic=True)
+    result = tracker.deltas('nic', {name: [getattr(counters, field) for field in NIC_FIELDS]
+                                    for name, counters in nics.items()}, now)
+    if result:
+        names, delta, elapsed = result
+        rates['nics'] = to_dict(names, [f"{field}_per_sec" for field in NIC_FIELDS], delta / elapsed)
+
+    disks = psutil.disk_io_counters(perdisk=True) or {}
+    # busy_time is Linux-only; elsewhere fall back to the summed read/write time.
+    busy_fields = ('busy_time',) if disks and 'busy_time' in next(iter(disks.values()))._fields \
+        else ('read_time', 'write_time')
+    result = tracker.deltas('disk', {name: [getattr(counters, field) for field in DISK_FIELDS]
+                                     + [sum(getattr(counters, field) for field in busy_fields)]
+                                     for name, counters in disks.items()}, now)
+    if result:
+        names, delta, elapsed = result
+        matrix = np.column_stack([delta[:, :4] / elapsed,
+                                  np.clip(delta[:, 4] / (elapsed * 10), 0, 100)])
+        rates['disks'] = to_dict(names, DISK_RATE_NAMES + ('busy_percent',), matrix)
+    return rates
+
+
+def summarize_device_rates(rates):
+    # The per-device tables are too large to keep per sample; the daemon keeps
+    # these alertable summaries instead. NaN marks a counter reset.
+    def finite(values):
+        return [value for value in values if value == value]
+
+    cores = finite(rates['cpu_cores'] or [])
+    busy = finite(disk['busy_percent'] for disk in rates['disks'].values())
+    errors = finite(sum(nic[f"{field}_per_sec"] for field in NIC_FIELDS[4:])
+                    for nic in rates['nics'].values())
+    return {
+        'cpu_core_max': max(cores) if cores else None,
+        'disk_busy_max': max(busy) if busy else None,
+        'nic_errors_per_sec': sum(errors) if rates['nics'] else None
+    }
+
+
+def present_device_rates(rates):
+    headers = ["Device", "Metric", "Value"]
+    data = []
+    for core, percent in enumerate(rates['cpu_cores'] or []):
+        data.append([f"cpu{core}", "Utilisation", f"{percent:.1f}%"])
+    for name, nic in rates['nics'].items():
+        data.append([name, "Sent / Received",
+                     f"{nic['bytes_sent_per_sec'] / 1024:.2f} / {nic['bytes_recv_per_sec'] / 1024:.2f} KB/s"])
+        data.append([name, "Packets Sent / Received",
+                     f"{nic['packets_sent_per_sec']:.1f} / {nic['packets_recv_per_sec']:.1f} /s"])
+        data.append([name, "Errors / Drops",
+                     f"{nic['errin_per_sec'] + nic['errout_per_sec']:.1f} / "
+                     f"{nic['dropin_per_sec'] + nic['dropout_per_sec']:.1f} /s"])
+    for name, disk in rates['disks'].items():
+        data.append([name, "Read / Write IOPS", f"{disk['read_iops']:.1f} / {disk['write_iops']:.1f}"])
+        data.append([name, "Read / Write",
+                     f"{disk['read_bytes_per_sec'] / 1024:.2f} / {disk['write_bytes_per_sec'] / 1024:.2f} KB/s"])
+        data.append([name, "Busy", f"{disk['busy_percent']:.1f}%"])
+    for mountpoint, percent in rates['filesystems'].items():
+        data.append([mountpoint, "Usage", colorize_usage(percent, USAGE_THRESHOLD)])
+    from tabulate import tabulate
+    print(tabulate(data, headers, tablefmt="grid"))
+
+
 def colorize_usage(value, threshold):
     if value > threshold:
         return f"{Fore.RED}{value}%{Style.RESET_ALL}"
     return f"{Fore.GREEN}{value}%{Style.RESET_ALL}"
 
 
-def get_system_info():
-    cpu_info = cpuinfo.get_cpu_info()
-    return {
-        'OS': platform.system(),
-        'OS Version': platform.version(),
-        'Machine': platform.machine(),
-        'Processor': cpu_info.get('brand_raw', 'Unknown Processor'),
-        'Uptime': time.time() - psutil.boot_time(),
-        'Is Raspberry Pi': is_raspberry_pi()
-    }
+def get_system_info(use_cache=True):
+    system_info = dict(get_static_info(use_cache))
+    system_info['Uptime'] = time.time() - psutil.boot_time()
+    return system_info
 
 
-def network_speed_test():
+NO_SPEED_INFO = {
+    'Download Speed (Mbps)': None,
+    'Upload Speed (Mbps)': None
+}
+
+
+def ask_speed_test():
+    # Cron jobs and health checks have no one to answer the prompt.
+    if not sys.stdin.isatty():
+        return False
     valid_responses = ['yes', 'y', 'no', 'n']
     question = input(
         "Do you want to run a network speed test? (yes/no): ").strip().lower()
@@ -147,41 +647,212 @@ def network_speed_test():
             "Do you want to run a network speed test? (yes/no): ").strip().lower()
         if attempts == 0:
             print("Max attempts reached. Skipping speed test.\n")
-            return {
-                'Download Speed (Mbps)': None,
-                'Upload Speed (Mbps)': None
-            }
+            return False
+    return question in ['yes', 'y']
 
-    if question in ['no', 'n']:
+
+def run_speed_test(timeout=10, max_duration=None):
+    # `timeout` bounds every socket operation; `max_duration` stops the
+    # transfer threads through speedtest's shutdown event, so a stalled
+    # server cannot hold the run open indefinitely.
+    print(f"Running network speed test. This may take a few minutes...\n")
+    import speedtest
+    shutdown = threading.Event()
+    timer = None
+    if max_duration:
+        timer = threading.Timer(max_duration, shutdown.set)
+        timer.daemon = True
+        timer.start()
+    try:
+        st = speedtest.Speedtest(timeout=timeout, shutdown_event=shutdown)
+        download_speed = st.download() / 1_000_000
+        upload_speed = st.upload() / 1_000_000
         return {
-            'Download Speed (Mbps)': None,
-            'Upload Speed (Mbps)': None
+            'Download Speed (Mbps)': download_speed,
+            'Upload Speed (Mbps)': upload_speed
         }
-    else:
-        print(f"Running network speed test. This may take a few minutes...\n")
+    except speedtest.ConfigRetrievalError as e:
+        logging.error(f"Speedtest configuration error: {e}")
+        print("Unable to retrieve speed test configuration. Skipping speed test.\n")
+        return dict(NO_SPEED_INFO)
+    except speedtest.SpeedtestException as e:
+        logging.error(f"Speedtest failed: {e}")
+        return dict(NO_SPEED_INFO)
+    finally:
+        if timer:
+            timer.cancel()
+
+
+def network_speed_test():
+    return run_speed_test() if ask_speed_test() else dict(NO_SPEED_INFO)
+
+
+# Built-in throughput test between our own hosts. Each stream opens its own
+# TCP connection and sends a header naming the direction and duration; data
+# is pushed from, and received into, a buffer allocated once per stream.
+THROUGHPUT_PORT = 5201
+THROUGHPUT_HEADER = struct.Struct('!cd')
+THROUGHPUT_TOTAL = struct.Struct('!Q')
+# The server listens on all interfaces, so a stream that stalls (including one
+# that never sends its header) is dropped after THROUGHPUT_TIMEOUT seconds, and
+# no stream runs longer than THROUGHPUT_MAX_DURATION.
+THROUGHPUT_TIMEOUT = 10
+THROUGHPUT_MAX_DURATION = 60
+
+
+def recv_exactly(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("connection closed during handshake")
+        received += count
+    return bytes(data)
+
+
+def handle_throughput_stream(conn, address, buffer_size):
+    with conn:
         try:
-            st = speedtest.Speedtest()
-            download_speed = st.download() / 1_000_000
-            upload_speed = st.upload() / 1_000_000
-            return {
-                'Download Speed (Mbps)': download_speed,
-                'Upload Speed (Mbps)': upload_speed
-            }
-        except speedtest.ConfigRetrievalError as e:
-            logging.error(f"Speedtest configuration error: {e}")
-            print("Unable to retrieve speed test configuration. Skipping speed test.\n")
-            return {
-                'Download Speed (Mbps)': None,
-                'Upload Speed (Mbps)': None
-            }
+            conn.settimeout(THROUGHPUT_TIMEOUT)
+            direction, duration = THROUGHPUT_HEADER.unpack(recv_exactly(conn, THROUGHPUT_HEADER.size))
+            deadline = time.monotonic() + max(0.0, min(duration, THROUGHPUT_MAX_DURATION))
+            view = memoryview(bytearray(buffer_size))
+            if direction == b'D':
+                while time.monotonic() < deadline:
+                    conn.send(view)
+                conn.shutdown(socket.SHUT_WR)
+            elif direction == b'U':
+                # Allow for data still in flight when the client's clock runs out.
+                deadline += THROUGHPUT_TIMEOUT
+                total = 0
+                while time.monotonic() < deadline:
+                    count = conn.recv_into(view)
+                    if count == 0:
+                        break
+                    total += count
+                conn.sendall(THROUGHPUT_TOTAL.pack(total))
+        except OSError as e:
+            logging.warning(f"Throughput stream from {address[0]} failed: {e}")
+
+
+def start_throughput_server(host='0.0.0.0', port=THROUGHPUT_PORT, buffer_size=128 * 1024):
+    server = socket.create_server((host, port))
+
+    def serve():
+        while True:
+            try:
+                conn, address = server.accept()
+            except OSError:
+                break
+            threading.Thread(target=handle_throughput_stream, args=(conn, address, buffer_size),
+                             daemon=True).start()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def run_throughput_stream(host, port, direction, duration, buffer_size, report_interval, start_barrier):
+    intervals = collections.defaultdict(int)
+    view = memoryview(bytearray(buffer_size))
+    try:
+        sock = socket.create_connection((host, port), timeout=duration + 10)
+    except OSError:
+        start_barrier.abort()
+        raise
+    with sock:
+        sock.sendall(THROUGHPUT_HEADER.pack(b'D' if direction == 'download' else b'U', duration))
+        start_barrier.wait()
+        started = time.monotonic()
+        deadline = started + duration
+        total = 0
+        if direction == 'download':
+            while True:
+                count = sock.recv_into(view)
+                if count == 0:
+                    break
+                now = time.monotonic()
+                intervals[int((now - started) // report_interval)] += count
+                total += count
+        else:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                count = sock.send(view)
+                intervals[int((now - started) // report_interval)] += count
+                total += count
+            sock.shutdown(socket.SHUT_WR)
+            # The server's count excludes data still sitting in socket buffers.
+            total = THROUGHPUT_TOTAL.unpack(recv_exactly(sock, THROUGHPUT_TOTAL.size))[0]
+        elapsed = time.monotonic() - started
+    return {'bytes': total, 'elapsed': elapsed, 'intervals': intervals}
+
+
+def summarize_throughput(streams, report_interval):
+    elapsed = max(stream['elapsed'] for stream in streams)
+    slots = max((max(stream['intervals'], default=0) for stream in streams), default=0) + 1
+    # The last slot is usually partial, so leave it out of the jitter series.
+    intervals_mbps = [sum(stream['intervals'].get(i, 0) for stream in streams) * 8
+                      / report_interval / 1_000_000 for i in range(max(slots - 1, 1))]
+    return {
+        'aggregate_mbps': sum(stream['bytes'] for stream in streams) * 8 / elapsed / 1_000_000,
+        'streams_mbps': [stream['bytes'] * 8 / stream['elapsed'] / 1_000_000 for stream in streams],
+        'intervals_mbps': intervals_mbps,
+        'jitter_mbps': statistics.pstdev(intervals_mbps) if len(intervals_mbps) > 1 else 0.0
+    }
+
+
+def run_throughput_test(host, port=THROUGHPUT_PORT, streams=4, duration=5.0, directions=('download', 'upload'),
+                        buffer_size=128 * 1024, report_interval=0.5):
+    results = {}
+    for direction in directions:
+        # Streams start together once all are connected; a stream that cannot
+        # connect breaks the barrier for the others instead of hanging them.
+        barrier = threading.Barrier(streams, timeout=10)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=streams) as pool:
+            futures = [pool.submit(run_throughput_stream, host, port, direction, duration,
+                                   buffer_size, report_interval, barrier) for _ in range(streams)]
+            try:
+                stream_results = [future.result() for future in futures]
+            except (OSError, threading.BrokenBarrierError) as e:
+                logging.error(f"Throughput test ({direction}) to {host}:{port} failed: {e}")
+                results[direction] = None
+                continue
+        results[direction] = summarize_throughput(stream_results, report_interval)
+    return results
+
+
+def present_throughput_results(results):
+    headers = ["Direction", "Aggregate", "Per Stream", "Jitter"]
+    data = []
+    for direction, summary in results.items():
+        if summary is None:
+            data.append([direction.capitalize(), "Failed", "N/A", "N/A"])
+            continue
+        data.append([
+            direction.capitalize(),
+            f"{summary['aggregate_mbps']:.2f} Mbps",
+            ", ".join(f"{mbps:.1f}" for mbps in summary['streams_mbps']) + " Mbps",
+            f"{summary['jitter_mbps']:.2f} Mbps"
+        ])
+    from tabulate import tabulate
+    print(tabulate(data, headers, tablefmt="grid"))
 
 
 def send_notification(title, message):
-    notification.notify(
-        title=title,
-        message=message,
-        timeout=10
-    )
+    from plyer import notification
+    try:
+        notification.notify(
+            title=title,
+            message=message,
+            timeout=10
+        )
+    except Exception as e:
+        # Headless hosts have no notification service; the alert is still logged.
+        logging.error(f"Unable to send notification: {e}")
 
 
 def export_to_json(data, filename='results.json'):
@@ -189,20 +860,888 @@ def export_to_json(data, filename='results.json'):
         json.dump(data, f, indent=4)
 
 
-def present_results(cpu_usage, memory_usage, updates, response_time, disk_usage, network_info, system_info, speed_info):
+# Append-only sample store. Every series is a directory of fixed-width
+# little-endian float64 records split into time-aligned segment files, so a
+# range query only opens the segments it overlaps and bisects inside them.
+STORE_FIELDS = ('cpu_usage', 'memory_usage', 'disk_usage', 'bytes_sent', 'bytes_recv')
+STORE_ROLLUPS = {'1m': 60, '1h': 3600}
+SEGMENT_SPANS = {'raw': 86400, '1m': 30 * 86400, '1h': 366 * 86400}
+
+
+def store_fields(resolution):
+    if resolution == 'raw':
+        return ('timestamp',) + STORE_FIELDS
+    fields = ['timestamp', 'count']
+    for field in STORE_FIELDS:
+        fields += [f"{field}_min", f"{field}_max", f"{field}_mean"]
+    return tuple(fields)
+
+
+def record_struct(resolution):
+    return struct.Struct(f"<{len(store_fields(resolution))}d")
+
+
+def list_segments(directory, resolution):
+    segments = []
+    prefix = f"{resolution}-"
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        if name.startswith(prefix) and name.endswith('.seg'):
+            try:
+                segments.append((int(name[len(prefix):-4]), os.path.join(directory, name)))
+            except ValueError:
+                continue
+    return sorted(segments)
+
+
+def _bisect_records(buffer, count, record_size, timestamp):
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if struct.unpack_from('<d', buffer, middle * record_size)[0] < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def read_record_chunks(directory, resolution, start, end, chunk_records=65536):
+    # Yields flat array('d') chunks of whole records with start <= timestamp < end.
+    record_size = record_struct(resolution).size
+    span = SEGMENT_SPANS[resolution]
+    for segment_start, path in list_segments(directory, resolution):
+        if segment_start + span <= start or segment_start >= end:
+            continue
+        with open(path, 'rb') as f:
+            count = os.fstat(f.fileno()).st_size // record_size
+            if count == 0:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                first = _bisect_records(buffer, count, record_size, start)
+                last = _bisect_records(buffer, count, record_size, end)
+                for offset in range(first, last, chunk_records):
+                    chunk = array.array('d')
+                    chunk.frombytes(buffer[offset * record_size:
+                                           min(last, offset + chunk_records) * record_size])
+                    if sys.byteorder == 'big':
+                        chunk.byteswap()
+                    yield chunk
+
+
+def read_last_record(directory, resolution):
+    record = record_struct(resolution)
+    for _, path in reversed(list_segments(directory, resolution)):
+        size = os.path.getsize(path) // record.size * record.size
+        if size:
+            with open(path, 'rb') as f:
+                f.seek(size - record.size)
+                return record.unpack(f.read(record.size))
+    return None
+
+
+class SegmentWriter:
+    def __init__(self, directory, resolution, fsync_interval):
+        self.directory = directory
+        self.resolution = resolution
+        self.record = record_struct(resolution)
+        self.span = SEGMENT_SPANS[resolution]
+        self.fsync_interval = fsync_interval
+        self.segment_start = None
+        self.file = None
+        self.last_fsync = time.monotonic()
+
+    def append(self, values):
+        segment_start = int(values[0] // self.span) * self.span
+        if segment_start != self.segment_start:
+            self.rotate(segment_start)
+        self.file.write(self.record.pack(*values))
+        if time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def rotate(self, segment_start):
+        self.close()
+        path = os.path.join(self.directory, f"{self.resolution}-{segment_start:010d}.seg")
+        # Drop a torn record left behind by a crash mid-write.
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            if size % self.record.size:
+                os.truncate(path, size - size % self.record.size)
+        self.file = open(path, 'ab')
+        self.segment_start = segment_start
+
+    def sync(self):
+        if self.file:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def close(self):
+        if self.file:
+            self.sync()
+            self.file.close()
+            self.file = None
+            self.segment_start = None
+
+
+def lock_store(directory, wait=True):
+    # A store has a single writer: the daemon keeps records in its write
+    # buffer and open rollup buckets in memory, so a second process appending
+    # at the same time would interleave out-of-order records into a segment.
+    # The lock is released when the returned file is closed.
+    handle = open(os.path.join(directory, 'store.lock'), 'a')
+    try:
+        import fcntl
+
+        def acquire(block):
+            fcntl.flock(handle, fcntl.LOCK_EX if block else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        import msvcrt
+
+        def acquire(block):
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK if block else msvcrt.LK_NBLCK, 1)
+    try:
+        acquire(False)
+    except OSError:
+        if not wait:
+            handle.close()
+            raise OSError(f"Sample store {directory} is in use by another process")
+        logging.warning(f"Waiting for sample store {directory}, which is in use by another process")
+        acquire(True)
+    return handle
+
+
+class SampleStore:
+    def __init__(self, directory, fsync_interval=5.0, wait=True):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.lock = lock_store(directory, wait)
+        self.writers = {resolution: SegmentWriter(directory, resolution, fsync_interval)
+                        for resolution in SEGMENT_SPANS}
+        self.buckets = {resolution: None for resolution in STORE_ROLLUPS}
+        last = read_last_record(directory, 'raw')
+        self.last_timestamp = last[0] if last else None
+        self.recover_rollups()
+
+    def recover_rollups(self):
+        # Open rollup buckets are not persisted; rebuild them from the raw
+        # samples written since the last completed bucket.
+        segments = list_segments(self.directory, 'raw')
+        if not segments:
+            return
+        for resolution, seconds in STORE_ROLLUPS.items():
+            last = read_last_record(self.directory, resolution)
+            resume_from = last[0] + seconds if last else segments[-1][0]
+            for chunk in read_record_chunks(self.directory, 'raw', resume_from, float('inf')):
+                width = len(STORE_FIELDS) + 1
+                for i in range(0, len(chunk), width):
+                    self.roll(resolution, seconds, chunk[i], chunk[i + 1:i + width])
+
+    def append(self, sample):
+        timestamp = sample['timestamp']
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            logging.warning(f"Dropping out-of-order sample at {timestamp}")
+            return False
+        values = [float(sample[field]) for field in STORE_FIELDS]
+        self.writers['raw'].append([timestamp] + values)
+        for resolution, seconds in STORE_ROLLUPS.items():
+            self.roll(resolution, seconds, timestamp, values)
+        self.last_timestamp = timestamp
+        return True
+
+    def roll(self, resolution, seconds, timestamp, values):
+        bucket_start = timestamp - timestamp % seconds
+        bucket = self.buckets[resolution]
+        if bucket and bucket[0] != bucket_start:
+            record = [bucket[0], bucket[1]]
+            for low, high, total in zip(bucket[2], bucket[3], bucket[4]):
+                record += [low, high, total / bucket[1]]
+            self.writers[resolution].append(record)
+            bucket = None
+        if bucket is None:
+            bucket = self.buckets[resolution] = [bucket_start, 0, list(values), list(values),
+                                                 [0.0] * len(values)]
+        bucket[1] += 1
+        for i, value in enumerate(values):
+            bucket[2][i] = min(bucket[2][i], value)
+            bucket[3][i] = max(bucket[3][i], value)
+            bucket[4][i] += value
+
+    def query(self, start, end, resolution='raw'):
+        width = len(store_fields(resolution))
+        for chunk in read_record_chunks(self.directory, resolution, start, end):
+            for i in range(0, len(chunk), width):
+                yield tuple(chunk[i:i + width])
+
+    def sync(self):
+        for writer in self.writers.values():
+            writer.sync()
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.lock.close()
+
+
+# Alert engine. Each rule keeps a small incremental statistic over its metric
+# and a state machine (ok -> pending -> firing) with separate enter and exit
+# thresholds, so one noisy sample neither raises nor clears an alert.
+USAGE_THRESHOLD = 75
+DEFAULT_ALERT_RULES = [
+    {'name': 'High CPU usage', 'metric': 'cpu_usage', 'enter': USAGE_THRESHOLD},
+    {'name': 'High memory usage', 'metric': 'memory_usage', 'enter': USAGE_THRESHOLD},
+    {'name': 'High disk usage', 'metric': 'disk_usage', 'enter': USAGE_THRESHOLD}
+]
+
+
+class ValueStat:
+    def __init__(self, rule):
+        self.value = None
+
+    def update(self, timestamp, value):
+        self.value = value
+        return value
+
+
+class EwmaStat:
+    def __init__(self, rule):
+        self.alpha = rule.get('alpha', 0.3)
+        self.value = None
+
+    def update(self, timestamp, value):
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class RateStat:
+    # Change per second between the oldest and newest sample in the window.
+    def __init__(self, rule):
+        self.seconds = rule.get('seconds', 60)
+        self.samples = collections.deque()
+
+    def update(self, timestamp, value):
+        self.samples.append((timestamp, value))
+        while self.samples[0][0] < timestamp - self.seconds:
+            self.samples.popleft()
+        first_time, first_value = self.samples[0]
+        return (value - first_value) / (timestamp - first_time) if timestamp > first_time else 0.0
+
+
+class PercentileStat:
+    # A fixed-bin histogram over the window: adding and evicting a sample is
+    # O(1) and the percentile lookup is bounded by the number of bins.
+    def __init__(self, rule):
+        self.seconds = rule.get('seconds', 60)
+        self.percentile = rule.get('percentile', 95)
+        self.low, self.high = rule.get('range', (0, 100))
+        self.bins = [0] * rule.get('bins', 100)
+        self.width = (self.high - self.low) / len(self.bins)
+        self.samples = collections.deque()
+
+    def update(self, timestamp, value):
+        index = min(max(int((value - self.low) / self.width), 0), len(self.bins) - 1)
+        self.samples.append((timestamp, index))
+        self.bins[index] += 1
+        while self.samples[0][0] < timestamp - self.seconds:
+            self.bins[self.samples.popleft()[1]] -= 1
+        target = len(self.samples) * self.percentile / 100
+        seen = 0
+        for index, count in enumerate(self.bins):
+            seen += count
+            if seen >= target:
+                return self.low + (index + 1) * self.width
+        return self.high
+
+
+ALERT_STATS = {'value': ValueStat, 'ewma': EwmaStat, 'rate': RateStat, 'percentile': PercentileStat}
+
+
+def load_alert_rules(filename):
+    with open(filename) as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise ValueError(f"{filename} must contain a list of alert rules")
+    for rule in rules:
+        if not isinstance(rule, dict):
+            raise ValueError(f"Alert rule {rule!r} is not an object")
+        for key in ('name', 'metric', 'enter'):
+            if key not in rule:
+                raise ValueError(f"Alert rule {rule} is missing '{key}'")
+        if rule.get('stat', 'value') not in ALERT_STATS:
+            raise ValueError(f"Alert rule {rule['name']!r} has unknown stat {rule['stat']!r}")
+        # An exit threshold past enter could never be reached while firing.
+        sign = 1 if rule.get('above', True) else -1
+        if sign * (rule.get('exit', rule['enter']) - rule['enter']) > 0:
+            raise ValueError(f"Alert rule {rule['name']!r} has its exit threshold on the wrong "
+                             f"side of enter, so it could never resolve")
+    return rules
+
+
+def alert_thresholds(rules):
+    thresholds = {}
+    for rule in rules:
+        if rule.get('above', True):
+            thresholds[rule['metric']] = min(rule['enter'], thresholds.get(rule['metric'], rule['enter']))
+    return thresholds
+
+
+class AlertEngine:
+    def __init__(self, rules):
+        self.rules = collections.defaultdict(list)
+        for rule in rules:
+            self.rules[rule['metric']].append({
+                'rule': rule,
+                'stat': ALERT_STATS[rule.get('stat', 'value')](rule),
+                'sign': 1 if rule.get('above', True) else -1,
+                'exit': rule.get('exit', rule['enter']),
+                'state': 'ok',
+                'since': None,
+                'notified_at': None
+            })
+
+    def observe(self, sample):
+        timestamp = sample.get('timestamp', time.time())
+        events = []
+        for metric, states in self.rules.items():
+            value = sample.get(metric)
+            if value is None:
+                continue
+            for state in states:
+                event = self.evaluate(state, timestamp, value)
+                if event:
+                    events.append(event)
+        return events
+
+    def evaluate(self, state, timestamp, value):
+        rule = state['rule']
+        current = state['stat'].update(timestamp, value)
+        threshold = state['exit'] if state['state'] == 'firing' else rule['enter']
+        breached = state['sign'] * (current - threshold) > 0
+        if not breached:
+            if state['state'] == 'firing':
+                state['state'], state['since'] = 'ok', None
+                return {'rule': rule['name'], 'metric': rule['metric'], 'state': 'resolved',
+                        'value': current, 'timestamp': timestamp, 'notify': False}
+            state['state'], state['since'] = 'ok', None
+            return None
+        if state['state'] == 'firing':
+            return None
+        if state['since'] is None:
+            state['since'] = timestamp
+        if timestamp - state['since'] < rule.get('sustain', 0):
+            state['state'] = 'pending'
+            return None
+        state['state'] = 'firing'
+        cooldown = rule.get('cooldown', 300)
+        notify = state['notified_at'] is None or timestamp - state['notified_at'] >= cooldown
+        if notify:
+            state['notified_at'] = timestamp
+        return {'rule': rule['name'], 'metric': rule['metric'], 'state': 'firing',
+                'value': current, 'timestamp': timestamp, 'notify': notify}
+
+
+# Which top-process ranking explains an alert on each metric.
+ALERT_PROCESS_METRICS = {'cpu_usage': 'cpu_percent', 'memory_usage': 'rss',
+                         'disk_usage': 'io_bytes_per_sec'}
+
+
+def notify_alerts(events, top_processes=None):
+    # Firing alerts name the processes leading the matching ranking from the
+    # latest top-N sweep. That goes on its own log line, so the alert line
+    # keeps the format the report parses.
+    messages = []
+    for event in events:
+        logging.warning(f"Alert {event['rule']} {event['state']}: {event['metric']} = {event['value']:.2f}")
+        message = f"{event['rule']}: {event['value']:.1f}"
+        metric = ALERT_PROCESS_METRICS.get(event['metric'])
+        if event['state'] == 'firing' and top_processes and top_processes.get(metric):
+            culprits = describe_top_processes(top_processes[metric], metric)
+            logging.warning(f"Top processes for {event['rule']}: {culprits}")
+            message += f" (top: {culprits})"
+        if event['notify']:
+            messages.append(message)
+    if messages:
+        send_notification("High Resource Usage", ", ".join(messages))
+
+
+# Collector pipeline. Cheap collectors run inline; expensive ones run in a
+# worker pool and are given up on once their deadline passes, so one slow
+# stage cannot hold back the rest of the report.
+CHEAP = 'cheap'
+EXPENSIVE = 'expensive'
+COLLECTORS = {}
+
+
+def collector(name, cost, deadline, default=None):
+    def register(func):
+        COLLECTORS[name] = {'name': name, 'func': func, 'cost': cost,
+                            'deadline': deadline, 'default': default}
+        return func
+    return register
+
+
+@collector('cpu_usage', CHEAP, deadline=1, default=0.0)
+def collect_cpu_usage(context):
+    return get_cpu_usage()
+
+
+@collector('memory_usage', CHEAP, deadline=1, default=0.0)
+def collect_memory_usage(context):
+    return get_memory_usage()
+
+
+@collector('disk_usage', CHEAP, deadline=1, default=0.0)
+def collect_disk_usage(context):
+    return get_disk_usage()
+
+
+@collector('network_info', CHEAP, deadline=1,
+           default={'kilobytes_sent': 0.0, 'kilobytes_received': 0.0})
+def collect_network_info(context):
+    return get_network_information()
+
+
+@collector('system_info', CHEAP, deadline=5)
+def collect_system_info(context):
+    return get_system_info(context.get('use_cache', True))
+
+
+@collector('top_processes', EXPENSIVE, deadline=10, default={})
+def collect_top_processes(context):
+    # The first sweep only records counters (n=0 skips the name lookups), so
+    # CPU and IO come out as rates over the window rather than lifetime
+    # averages. A zero window skips it and reports lifetime averages.
+    if context.get('rate_window', 1.0) > 0:
+        get_top_processes(0)
+        time.sleep(context.get('rate_window', 1.0))
+    return get_top_processes(context.get('top_n', 5))
+
+
+@collector('device_rates', EXPENSIVE, deadline=5, default={})
+def collect_device_rates(context):
+    # A zero window has no rates to compute: report filesystem usage only,
+    # without paying for the NumPy import.
+    if context.get('rate_window', 1.0) <= 0:
+        return {'cpu_cores': None, 'nics': {}, 'disks': {}, 'filesystems': get_filesystem_usage()}
+    tracker = CounterTracker()
+    get_device_rates(tracker)
+    time.sleep(context.get('rate_window', 1.0))
+    return get_device_rates(tracker)
+
+
+@collector('response_time', EXPENSIVE, deadline=20)
+def collect_response_time(context):
+    return measure_system_response(context['url']) if context.get('url') else None
+
+
+@collector('updates', EXPENSIVE, deadline=120, default=False)
+def collect_updates(context):
+    return check_os_updates(context.get('updates_ttl', 0), interactive=False, timeout=120)
+
+
+@collector('speed_info', EXPENSIVE, deadline=300, default=NO_SPEED_INFO)
+def collect_speed_info(context):
+    return (run_speed_test(max_duration=240) if context.get('speed_test')
+            else dict(NO_SPEED_INFO))
+
+
+REPORT_COLLECTORS = ['cpu_usage', 'memory_usage', 'disk_usage', 'network_info', 'system_info',
+                     'response_time', 'updates', 'speed_info', 'top_processes', 'device_rates']
+
+
+def run_collector(entry, context):
+    started = time.monotonic()
+    try:
+        value, status = entry['func'](context), 'ok'
+    except Exception as e:
+        logging.error(f"Collector {entry['name']} failed: {e}")
+        value, status = entry['default'], 'error'
+    elapsed = time.monotonic() - started
+    record_timing(entry['name'], elapsed)
+    return {'value': value, 'status': status, 'elapsed': elapsed}
+
+
+def run_collectors(context, names=None):
+    # Yields (name, result) pairs as soon as each collector finishes or
+    # misses its deadline. Expensive collectors run in daemon threads: one
+    # that overruns is abandoned, and cannot keep the process alive at exit
+    # the way a pool worker (joined at interpreter shutdown) would.
+    entries = [COLLECTORS[name] for name in (names or COLLECTORS)]
+    started = time.monotonic()
+    finished = queue.Queue()
+    pending = {}
+    for entry in entries:
+        if entry['cost'] == EXPENSIVE:
+            pending[entry['name']] = entry
+            threading.Thread(target=lambda entry=entry: finished.put(
+                (entry['name'], run_collector(entry, context))),
+                name=f"collector-{entry['name']}", daemon=True).start()
+    for entry in entries:
+        if entry['cost'] == CHEAP:
+            yield entry['name'], run_collector(entry, context)
+    while pending:
+        next_deadline = min(started + entry['deadline'] for entry in pending.values())
+        try:
+            name, result = finished.get(timeout=max(0, next_deadline - time.monotonic()))
+            if pending.pop(name, None):
+                yield name, result
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        for name, entry in list(pending.items()):
+            if started + entry['deadline'] <= now:
+                del pending[name]
+                logging.warning(f"Collector {name} timed out after {entry['deadline']}s")
+                yield name, {'value': entry['default'], 'status': 'timed out',
+                             'elapsed': now - started}
+
+
+# Fleet mode. Agents ship batches of raw store records to an aggregator as
+# zlib-compressed, length-prefixed frames over one persistent connection and
+# wait for a one-byte ack per frame. Frames that cannot be sent are spooled to
+# disk and replayed, oldest first, once the aggregator is reachable again.
+FLEET_PORT = 5300
+METRICS_PORT = 9300
+FRAME_HEADER = struct.Struct('!I')
+BATCH_HEADER = struct.Struct('!HI')
+FRAME_ACK = b'\x06'
+FRAME_NAK = b'\x15'
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+# Decompressed size limit; without it one small frame can expand to gigabytes.
+MAX_BATCH_SIZE = 16 * 1024 * 1024
+
+
+def parse_address(value, default_port):
+    host, _, port = value.rpartition(':')
+    if not host:
+        return value, default_port
+    return host, int(port)
+
+
+def encode_batch(host, records):
+    record = record_struct('raw')
+    name = host.encode()
+    payload = BATCH_HEADER.pack(len(name), len(records)) + name + b''.join(
+        record.pack(*values) for values in records)
+    data = zlib.compress(payload)
+    return FRAME_HEADER.pack(len(data)) + data
+
+
+def decode_batch(data):
+    inflater = zlib.decompressobj()
+    payload = inflater.decompress(data, MAX_BATCH_SIZE)
+    if inflater.unconsumed_tail:
+        raise ValueError(f"batch expands beyond {MAX_BATCH_SIZE} bytes")
+    if not inflater.eof:
+        raise ValueError("batch is truncated")
+    name_length, count = BATCH_HEADER.unpack_from(payload)
+    offset = BATCH_HEADER.size + name_length
+    host = payload[BATCH_HEADER.size:offset].decode(errors='replace')
+    record = record_struct('raw')
+    if len(payload) != offset + count * record.size:
+        raise ValueError("batch length does not match its record count")
+    return host, [record.unpack_from(payload, offset + i * record.size) for i in range(count)]
+
+
+def split_frames(data):
+    # Returns the complete frames and the number of bytes they span; a frame
+    # torn by a crash while spooling is left out.
+    frames = []
+    offset = 0
+    while offset + FRAME_HEADER.size <= len(data):
+        end = offset + FRAME_HEADER.size + FRAME_HEADER.unpack_from(data, offset)[0]
+        if end > len(data):
+            break
+        frames.append(data[offset:end])
+        offset = end
+    return frames, offset
+
+
+class FleetShipper:
+    def __init__(self, address, spool_dir='spool', batch_size=60, max_pending=16,
+                 spool_limit=64 * 1024 * 1024, host=None):
+        os.makedirs(spool_dir, exist_ok=True)
+        self.address = address
+        self.host = host or platform.node()
+        self.batch = []
+        self.batch_size = batch_size
+        # The bounded queue is the backpressure point: once the sender falls
+        # behind, new frames go straight to the spool instead of memory.
+        self.frames = queue.Queue(maxsize=max_pending)
+        self.spool_path = os.path.join(spool_dir, 'spool.bin')
+        self.replay_path = os.path.join(spool_dir, 'replay.bin')
+        # Bytes of replay.bin already acked, so a shutdown or crash mid-replay
+        # does not send them again.
+        self.offset_path = os.path.join(spool_dir, 'replay.pos')
+        self.spool_limit = spool_limit
+        self.truncate_spool()
+        self.lock = threading.Lock()
+        # Frames are delivered oldest first: the in-flight frame, then the
+        # queue, then replay.bin, then spool.bin. While anything is spooled,
+        # new frames are spooled behind it rather than queued ahead of it.
+        self.spooling = os.path.exists(self.spool_path) or os.path.exists(self.replay_path)
+        self.stop_event = threading.Event()
+        self.sock = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, sample):
+        self.batch.append([sample['timestamp']] + [float(sample[field]) for field in STORE_FIELDS])
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        frame = encode_batch(self.host, self.batch)
+        self.batch = []
+        with self.lock:
+            if not self.spooling:
+                try:
+                    self.frames.put_nowait(frame)
+                    return
+                except queue.Full:
+                    self.spooling = True
+            self.spool(frame)
+
+    def truncate_spool(self):
+        # Drop a frame torn by a crash mid-write, so the next frame is not
+        # appended after a partial header and misread with it.
+        if os.path.exists(self.spool_path):
+            with open(self.spool_path, 'rb') as f:
+                _, offset = split_frames(f.read())
+            if offset != os.path.getsize(self.spool_path):
+                logging.warning(f"Dropping a torn frame at the end of {self.spool_path}")
+                os.truncate(self.spool_path, offset)
+
+    def spool(self, frame):
+        # Called with self.lock held.
+        size = os.path.getsize(self.spool_path) if os.path.exists(self.spool_path) else 0
+        if size + len(frame) > self.spool_limit:
+            logging.warning(f"Spool {self.spool_path} is full, dropping a batch")
+            return
+        with open(self.spool_path, 'ab') as f:
+            f.write(frame)
+
+    def spool_front(self, frames):
+        # Frames still in memory at shutdown are older than anything on disk,
+        # so they go ahead of the unsent part of replay.bin.
+        with self.lock:
+            data = b''
+            if os.path.exists(self.replay_path):
+                with open(self.replay_path, 'rb') as f:
+                    data = f.read()[self.replay_offset():]
+            with open(self.replay_path + '.tmp', 'wb') as f:
+                f.write(b''.join(frames) + data)
+            os.replace(self.replay_path + '.tmp', self.replay_path)
+            self.set_replay_offset(0)
+            self.spooling = True
+
+    def replay_offset(self):
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return 0
+
+    def set_replay_offset(self, offset):
+        if not offset:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.offset_path)
+            return
+        with open(self.offset_path + '.tmp', 'w') as f:
+            f.write(str(offset))
+        os.replace(self.offset_path + '.tmp', self.offset_path)
+
+    def send(self, frame):
+        if self.sock is None:
+            self.sock = socket.create_connection(self.address, timeout=10)
+        self.sock.sendall(frame)
+        if recv_exactly(self.sock, 1) == FRAME_NAK:
+            logging.error(f"Aggregator {self.address[0]}:{self.address[1]} rejected a batch")
+
+    def replay_spool(self):
+        with self.lock:
+            # Queued frames are older than the spool and are sent first.
+            if not self.frames.empty():
+                return
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.spool_path):
+                    self.spooling = False
+                    return
+                os.replace(self.spool_path, self.replay_path)
+        with open(self.replay_path, 'rb') as f:
+            offset = self.replay_offset()
+            frames, _ = split_frames(f.read()[offset:])
+        for frame in frames:
+            if self.stop_event.is_set():
+                return
+            self.send(frame)
+            offset += len(frame)
+            self.set_replay_offset(offset)
+        with self.lock:
+            os.remove(self.replay_path)
+            self.set_replay_offset(0)
+
+    def close_socket(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def run(self):
+        backoff = 1
+        frame = None
+        while True:
+            if frame is None:
+                try:
+                    frame = self.frames.get(timeout=1)
+                except queue.Empty:
+                    if self.stop_event.is_set():
+                        break
+            try:
+                if frame is not None:
+                    # A frame that fails is kept and retried, so nothing
+                    # queued after it can overtake it.
+                    self.send(frame)
+                    frame = None
+                else:
+                    self.replay_spool()
+                backoff = 1
+            except OSError as e:
+                logging.warning(f"Aggregator {self.address[0]}:{self.address[1]} unreachable: {e}")
+                self.close_socket()
+                if self.stop_event.wait(backoff):
+                    break
+                backoff = min(backoff * 2, 60)
+        # Whatever could not be delivered before shutdown is kept for next time.
+        leftover = [frame] if frame is not None else []
+        while not self.frames.empty():
+            leftover.append(self.frames.get_nowait())
+        if leftover:
+            self.spool_front(leftover)
+        self.close_socket()
+
+    def close(self, timeout=30):
+        self.flush()
+        self.stop_event.set()
+        self.thread.join(timeout)
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class FleetAggregator:
+    def __init__(self, refresh_interval=1.0):
+        self.latest = {}
+        self.received = collections.Counter()
+        self.refresh_interval = refresh_interval
+        self.dirty = True
+        self.rendered = b''
+        self.rendered_at = float('-inf')
+
+    def ingest(self, host, records):
+        if not records:
+            return
+        newest = max(records)
+        if host not in self.latest or newest[0] >= self.latest[host][0]:
+            self.latest[host] = newest
+        self.received[host] += len(records)
+        self.dirty = True
+
+    def metrics(self):
+        # Scrapes get the cached rendering; it is rebuilt at most once per
+        # refresh interval and only when new samples have arrived.
+        now = time.monotonic()
+        if self.dirty and now - self.rendered_at >= self.refresh_interval:
+            self.rendered = self.render()
+            self.rendered_at = now
+            self.dirty = False
+        return self.rendered
+
+    def render(self):
+        labels = {host: f'{{host="{escape_label(host)}"}}' for host in self.latest}
+        lines = []
+        for index, field in enumerate(STORE_FIELDS, start=1):
+            lines.append(f"# TYPE system_analyzer_{field} gauge")
+            lines.extend(f"system_analyzer_{field}{labels[host]} {record[index]}"
+                         for host, record in self.latest.items())
+        lines.append("# TYPE system_analyzer_last_sample_timestamp_seconds gauge")
+        lines.extend(f"system_analyzer_last_sample_timestamp_seconds{labels[host]} {record[0]}"
+                     for host, record in self.latest.items())
+        lines.append("# TYPE system_analyzer_samples_received_total counter")
+        lines.extend(f"system_analyzer_samples_received_total{labels[host]} {count}"
+                     for host, count in self.received.items())
+        return ("\n".join(lines) + "\n").encode()
+
+    async def handle_agent(self, reader, writer):
+        try:
+            while True:
+                length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))[0]
+                if length > MAX_FRAME_SIZE:
+                    logging.error(f"Dropping agent sending a {length} byte frame")
+                    break
+                data = await reader.readexactly(length)
+                try:
+                    host, records = decode_batch(data)
+                except (zlib.error, struct.error, ValueError) as e:
+                    logging.error(f"Rejected malformed batch: {e}")
+                    writer.write(FRAME_NAK)
+                else:
+                    self.ingest(host, records)
+                    writer.write(FRAME_ACK)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_http(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[1] == b'/metrics':
+                status, body = b'200 OK', self.metrics()
+            else:
+                status, body = b'404 Not Found', b'Not Found\n'
+            writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: text/plain; version=0.0.4'
+                         b'\r\nContent-Length: ' + str(len(body)).encode()
+                         + b'\r\nConnection: close\r\n\r\n' + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='0.0.0.0', port=FLEET_PORT, metrics_port=METRICS_PORT, ready=None):
+        ingest = await asyncio.start_server(self.handle_agent, host, port)
+        http = await asyncio.start_server(self.handle_http, host, metrics_port)
+        if ready:
+            ready(ingest, http)
+        async with ingest, http:
+            await asyncio.gather(ingest.serve_forever(), http.serve_forever())
+
+
+def present_results(cpu_usage, memory_usage, updates, response_time, disk_usage, network_info, system_info, speed_info, statuses=None, thresholds=None):
+    statuses = statuses or {}
+    thresholds = thresholds or {}
+
+    def show(name, text):
+        return "Timed out" if statuses.get(name) == 'timed out' else text
+
     headers = ["Metric", "Value"]
     data = [
-        ["CPU Usage", colorize_usage(cpu_usage, 75) + "%"],
-        ["Memory Usage", colorize_usage(memory_usage, 75) + "%"],
-        ["Updates Available", "Yes" if updates else "No"],
-        ["Response Time", f"{response_time} ms" if response_time else "N/A"],
-        ["Disk Usage", colorize_usage(disk_usage, 75) + "%"],
+        ["CPU Usage", colorize_usage(cpu_usage, thresholds.get('cpu_usage', USAGE_THRESHOLD)) + "%"],
+        ["Memory Usage", colorize_usage(memory_usage, thresholds.get('memory_usage', USAGE_THRESHOLD)) + "%"],
+        ["Updates Available", show('updates', "Yes" if updates else "No")],
+        ["Response Time", show('response_time', f"{response_time} ms" if response_time else "N/A")],
+        ["Disk Usage", colorize_usage(disk_usage, thresholds.get('disk_usage', USAGE_THRESHOLD)) + "%"],
         ["KB Sent", f"{network_info['kilobytes_sent']:.2f} KB"],
         ["KB Received", f"{network_info['kilobytes_received']:.2f} KB"],
-        ["Download Speed",
-            f"{speed_info['Download Speed (Mbps)']:.2f} Mbps" if speed_info['Download Speed (Mbps)'] else "N/A"],
-        ["Upload Speed",
-            f"{speed_info['Upload Speed (Mbps)']:.2f} Mbps" if speed_info['Upload Speed (Mbps)'] else "N/A"],
+        ["Download Speed", show('speed_info',
+            f"{speed_info['Download Speed (Mbps)']:.2f} Mbps" if speed_info['Download Speed (Mbps)'] else "N/A")],
+        ["Upload Speed", show('speed_info',
+            f"{speed_info['Upload Speed (Mbps)']:.2f} Mbps" if speed_info['Upload Speed (Mbps)'] else "N/A")],
         ["OS", system_info['OS']],
         ["OS Version", system_info['OS Version']],
         ["Processor", system_info['Processor']],
@@ -210,16 +1749,950 @@ def present_results(cpu_usage, memory_usage, updates, response_time, disk_usage,
         ["Raspberry Pi", "Yes" if system_info['Is Raspberry Pi'] else "No"],
         ["Uptime", f"{system_info['Uptime'] / 3600:.2f} hours"]
     ]
+    from tabulate import tabulate
     print(tabulate(data, headers, tablefmt="grid"))
 
 
+# Opt-in self-instrumentation. When enabled, timed() feeds per-collector
+# wall-time histograms; when disabled it only costs a None check.
+TIMING_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+_timings = None
+
+
+def enable_instrumentation():
+    global _timings
+    _timings = {}
+
+
+def record_timing(name, seconds):
+    if _timings is None:
+        return
+    elapsed_ms = seconds * 1000
+    histogram = _timings.get(name)
+    if histogram is None:
+        histogram = _timings[name] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                      'buckets': [0] * (len(TIMING_BUCKETS_MS) + 1)}
+    histogram['count'] += 1
+    histogram['total_ms'] += elapsed_ms
+    histogram['max_ms'] = max(histogram['max_ms'], elapsed_ms)
+    histogram['buckets'][bisect.bisect_left(TIMING_BUCKETS_MS, elapsed_ms)] += 1
+
+
+@contextlib.contextmanager
+def timed(name):
+    if _timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started)
+
+
+def timing_summary():
+    summary = {}
+    for name, histogram in (_timings or {}).items():
+        labels = [f"<={bound}ms" for bound in TIMING_BUCKETS_MS] + [f">{TIMING_BUCKETS_MS[-1]}ms"]
+        summary[name] = {
+            'count': histogram['count'],
+            'mean_ms': histogram['total_ms'] / histogram['count'],
+            'max_ms': histogram['max_ms'],
+            'buckets': {label: count for label, count in zip(labels, histogram['buckets']) if count}
+        }
+    return summary
+
+
+def log_timing_summary():
+    for name, stats in timing_summary().items():
+        logging.info(f"Timing {name}: {stats['count']} calls, mean {stats['mean_ms']:.3f} ms, "
+                     f"max {stats['max_ms']:.3f} ms, histogram {stats['buckets']}")
+
+
+def start_profiling(profile_file, tracemalloc_file):
+    profiler = None
+    if profile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if tracemalloc_file:
+        import tracemalloc
+        tracemalloc.start()
+    return profiler
+
+
+def stop_profiling(profiler, profile_file, tracemalloc_file):
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        logging.info(f"cProfile stats written to {profile_file}")
+    if tracemalloc_file:
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(tracemalloc_file, 'w') as f:
+            f.write(f"Current traced memory: {current / 1024:.1f} KB, peak: {peak / 1024:.1f} KB\n")
+            for stat in snapshot.statistics('lineno')[:50]:
+                f.write(f"{stat}\n")
+        logging.info(f"tracemalloc report written to {tracemalloc_file}")
+
+
+# Benchmark suite. Each collector is timed in isolation (wall and CPU time),
+# then once more under tracemalloc for its peak allocation, and compared
+# against a stored baseline.
+BENCHMARK_BASELINE = os.path.join('benchmarks', 'baseline.json')
+# Differences below these floors are noise, whatever the relative change.
+BENCHMARK_FLOORS = {'wall_ms': 0.05, 'cpu_ms': 0.05, 'alloc_kb': 16}
+
+
+class QuietHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_os_updates_cached():
+    # Repeat runs within the TTL are what cron sees; the benchmark's warm-up
+    # call does the real check (or finds the existing cache) first.
+    with contextlib.redirect_stdout(None):
+        return check_os_updates(ttl=6 * 3600, interactive=False, timeout=120)
+
+
+def benchmark_targets(server_url):
+    own_process = psutil.Process()
+    tracker = CounterTracker()
+    engine = AlertEngine(DEFAULT_ALERT_RULES)
+    get_device_rates(tracker)
+    psutil.cpu_percent(interval=None)
+    return {
+        'cpu_usage': get_cpu_usage,
+        'memory_usage': get_memory_usage,
+        'disk_usage': get_disk_usage,
+        'network_info': get_network_information,
+        'system_info': get_system_info,
+        'filesystems': get_filesystem_usage,
+        'device_rates': lambda: get_device_rates(tracker),
+        'top_processes': lambda: get_top_processes(5),
+        'response_time': lambda: measure_system_response(server_url),
+        'updates_cached': check_os_updates_cached,
+        'full_tick': lambda: engine.observe(collect_sample(own_process))
+    }
+
+
+def run_benchmark(func, iterations):
+    import tracemalloc
+    func()
+    wall, cpu = [], []
+    for _ in range(iterations):
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        func()
+        cpu.append((time.process_time() - cpu_started) * 1000)
+        wall.append((time.perf_counter() - wall_started) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    wall.sort()
+    return {
+        'wall_ms': statistics.median(wall),
+        'wall_p95_ms': percentile(wall, 95),
+        'cpu_ms': statistics.median(cpu),
+        'alloc_kb': peak / 1024
+    }
+
+
+def run_benchmarks(iterations=20, names=None):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        targets = benchmark_targets(f"http://127.0.0.1:{server.server_address[1]}/")
+        return {name: run_benchmark(func, iterations) for name, func in targets.items()
+                if not names or name in names}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def compare_benchmarks(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric, floor in BENCHMARK_FLOORS.items():
+            if (result[metric] > previous[metric] * (1 + threshold)
+                    and result[metric] - previous[metric] > floor):
+                regressions.append(f"{name} {metric}: {previous[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def present_benchmark_results(results, baseline):
+    headers = ["Collector", "Wall (ms)", "Wall p95 (ms)", "CPU (ms)", "Peak Alloc (KB)", "Baseline Wall (ms)"]
+    data = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        data.append([name, f"{result['wall_ms']:.3f}", f"{result['wall_p95_ms']:.3f}",
+                     f"{result['cpu_ms']:.3f}", f"{result['alloc_kb']:.1f}",
+                     f"{previous['wall_ms']:.3f}" if previous else "N/A"])
+    from tabulate import tabulate
+    print(tabulate(data, headers, tablefmt="grid"))
+
+
+def benchmark(iterations, baseline_file, save_baseline, threshold):
+    results = run_benchmarks(iterations)
+    baseline = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+    present_benchmark_results(results, baseline)
+    if save_baseline:
+        os.makedirs(os.path.dirname(baseline_file) or '.', exist_ok=True)
+        export_to_json(results, baseline_file)
+        print(f"Baseline saved to {baseline_file}")
+        return True
+    regressions = compare_benchmarks(results, baseline, threshold)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return not regressions
+
+
+# Historical report. Stored samples are streamed chunk by chunk and folded
+# into fixed-bin histograms and running sums per metric and time bucket, so
+# memory stays bounded by the bucket count rather than the sample count.
+PERCENT_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+COUNTER_METRICS = ('bytes_sent', 'bytes_recv')
+REPORT_METRICS = PERCENT_METRICS + tuple(f"{metric}_per_sec" for metric in COUNTER_METRICS)
+ALERT_LOG_PATTERN = re.compile(
+    r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),\d+:\w+:Alert .*: (\w+) = ([-+\d.eE]+)$')
+
+
+def bin_steps(metric, coarse):
+    # Bins per percentage point, or per decade for rates.
+    if metric in PERCENT_METRICS:
+        return 1 if coarse else 10
+    return 10 if coarse else 100
+
+
+@functools.lru_cache(maxsize=None)
+def metric_bins(metric, coarse=False):
+    # Percentages use 0.1-wide linear bins (1-wide when coarse); rates use 100
+    # log bins per decade (10 when coarse) up to 1e12, with everything below 1
+    # in bin 0. The edges are shared by every accumulator, so they are cached
+    # and read-only.
+    import numpy as np
+    steps = bin_steps(metric, coarse)
+    if metric in PERCENT_METRICS:
+        edges = np.linspace(0, 100, 100 * steps + 1)
+    else:
+        edges = np.concatenate(([0.0], 10 ** (np.arange(12 * steps + 1) / steps)))
+    edges.flags.writeable = False
+    return edges
+
+
+def bin_indices(metric, values, coarse=False):
+    import numpy as np
+    steps = bin_steps(metric, coarse)
+    if metric in PERCENT_METRICS:
+        return np.clip((values * steps).astype(np.int64), 0, 100 * steps - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indices = 1 + np.floor(np.log10(values) * steps)
+    return np.clip(np.nan_to_num(indices, nan=0, neginf=0), 0, 12 * steps).astype(np.int64)
+
+
+def histogram_percentiles(counts, edges, percentiles):
+    import numpy as np
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    if total <= 0:
+        return [None] * len(percentiles)
+    targets = np.asarray(percentiles, dtype=np.float64) / 100 * total
+    indices = np.minimum(np.searchsorted(cumulative, targets), len(counts) - 1)
+    before = np.where(indices > 0, cumulative[indices - 1], 0)
+    within = np.where(counts[indices] > 0, (targets - before) / np.maximum(counts[indices], 1e-12), 0)
+    return (edges[indices] + np.clip(within, 0, 1) * (edges[indices + 1] - edges[indices])).tolist()
+
+
+class MetricAccumulator:
+    def __init__(self, metric, origin, coarse=False):
+        import numpy as np
+        self.metric = metric
+        self.origin = origin
+        self.coarse = coarse
+        self.counts = np.zeros(len(metric_bins(metric, coarse)) - 1)
+        self.weight = 0.0
+        self.total = 0.0
+        self.squares = 0.0
+        self.minimum = float('inf')
+        self.maximum = float('-inf')
+        # Running sums for the least-squares slope of value over time.
+        self.sum_t = self.sum_tt = self.sum_tv = 0.0
+
+    def add(self, timestamps, values, weights):
+        import numpy as np
+        keep = np.isfinite(values)
+        if not keep.all():
+            timestamps, values, weights = timestamps[keep], values[keep], weights[keep]
+        if not len(values):
+            return
+        t = timestamps - self.origin
+        self.counts += np.bincount(bin_indices(self.metric, values, self.coarse), weights=weights,
+                                   minlength=len(self.counts))
+        self.weight += float(weights.sum())
+        self.total += float((weights * values).sum())
+        self.squares += float((weights * values * values).sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.sum_t += float((weights * t).sum())
+        self.sum_tt += float((weights * t * t).sum())
+        self.sum_tv += float((weights * t * values).sum())
+
+    def summary(self):
+        if self.weight <= 0:
+            return None
+        mean = self.total / self.weight
+        variance = max(self.squares / self.weight - mean * mean, 0.0)
+        denominator = self.weight * self.sum_tt - self.sum_t ** 2
+        slope = ((self.weight * self.sum_tv - self.sum_t * self.total) / denominator
+                 if denominator > 1e-9 else 0.0)
+        # Interpolating inside a bin can overshoot the observed range.
+        p50, p95, p99 = [min(max(value, self.minimum), self.maximum) for value in
+                         histogram_percentiles(self.counts, metric_bins(self.metric, self.coarse),
+                                               (50, 95, 99))]
+        return {
+            'samples': self.weight,
+            'mean': mean,
+            'std': variance ** 0.5,
+            'min': self.minimum,
+            'max': self.maximum,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+            'slope_per_hour': slope * 3600
+        }
+
+    def coarse_histogram(self, bins=20):
+        import numpy as np
+        edges = metric_bins(self.metric, self.coarse)
+        starts = np.linspace(0, len(self.counts), bins + 1).astype(np.int64)
+        return {'edges': edges[starts].tolist(),
+                'counts': np.add.reduceat(self.counts, starts[:-1]).tolist()}
+
+
+class HistoryReport:
+    # The overall accumulators use fine bins; per-bucket ones use coarse bins,
+    # so a report with thousands of buckets stays small.
+    def __init__(self, start, end, bucket_seconds):
+        self.start = start
+        self.end = end
+        self.bucket_seconds = bucket_seconds
+        self.overall = {metric: MetricAccumulator(metric, start) for metric in REPORT_METRICS}
+        self.buckets = {}
+        self.previous_counters = None
+        # Alert log lines repeat values of samples that are already stored, so
+        # they are only counted, not folded into the distributions.
+        self.alerts = collections.Counter()
+
+    def add(self, metric, timestamps, values, weights):
+        import numpy as np
+        self.overall[metric].add(timestamps, values, weights)
+        indices = ((timestamps - self.start) // self.bucket_seconds).astype(np.int64)
+        order = np.argsort(indices, kind='stable')
+        indices, timestamps, values, weights = indices[order], timestamps[order], values[order], weights[order]
+        boundaries = np.flatnonzero(np.diff(indices)) + 1
+        for lower, upper in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(indices)]))):
+            bucket = int(indices[lower])
+            accumulators = self.buckets.setdefault(bucket, {})
+            if metric not in accumulators:
+                accumulators[metric] = MetricAccumulator(
+                    metric, self.start + bucket * self.bucket_seconds, coarse=True)
+            accumulators[metric].add(timestamps[lower:upper], values[lower:upper], weights[lower:upper])
+
+    def add_records(self, records, resolution):
+        # records is a 2D array in store_fields(resolution) column order, in
+        # time order across calls, which the counter-rate diff relies on.
+        import numpy as np
+        fields = store_fields(resolution)
+        timestamps = records[:, 0]
+        if resolution == 'raw':
+            weights = np.ones(len(records))
+            column = {field: records[:, fields.index(field)] for field in STORE_FIELDS}
+        else:
+            weights = records[:, 1]
+            column = {field: records[:, fields.index(f"{field}_mean")] for field in STORE_FIELDS}
+        for metric in PERCENT_METRICS:
+            self.add(metric, timestamps, column[metric], weights)
+
+        counters = np.column_stack([timestamps] + [column[metric] for metric in COUNTER_METRICS])
+        if self.previous_counters is not None:
+            counters_with_previous = np.vstack((self.previous_counters, counters))
+        else:
+            counters_with_previous = counters
+        self.previous_counters = counters[-1:]
+        deltas = np.diff(counters_with_previous, axis=0)
+        if not len(deltas):
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = deltas[:, 1:] / deltas[:, :1]
+        # Counters go backwards after a reboot; those intervals have no rate.
+        rates[(deltas[:, 1:] < 0) | ~(deltas[:, :1] > 0)] = np.nan
+        rate_times = counters_with_previous[1:, 0]
+        rate_weights = weights[-len(rate_times):]
+        for i, metric in enumerate(COUNTER_METRICS):
+            self.add(f"{metric}_per_sec", rate_times, rates[:, i], rate_weights)
+
+    def add_alerts(self, points):
+        for metric, timestamp, _ in points:
+            if self.start <= timestamp < self.end:
+                bucket = int((timestamp - self.start) // self.bucket_seconds)
+                self.alerts[metric, None] += 1
+                self.alerts[metric, bucket] += 1
+
+    def summary(self):
+        import numpy as np
+        report = {}
+        for metric in REPORT_METRICS:
+            overall = self.overall[metric].summary()
+            if overall is None:
+                continue
+            overall['alerts'] = self.alerts[metric, None]
+            buckets = []
+            for bucket in sorted(self.buckets):
+                accumulator = self.buckets[bucket].get(metric)
+                stats = accumulator.summary() if accumulator else None
+                if stats:
+                    stats['bucket_start'] = self.start + bucket * self.bucket_seconds
+                    stats['alerts'] = self.alerts[metric, bucket]
+                    buckets.append(stats)
+            flag_anomalies(buckets)
+            report[metric] = {'overall': overall, 'histogram': self.overall[metric].coarse_histogram(),
+                              'buckets': buckets}
+        return report
+
+
+def flag_anomalies(buckets, z_limit=3.0, mad_limit=3.5):
+    # Flags buckets whose mean is an outlier among all bucket means, by
+    # z-score and by the MAD-based modified z-score.
+    import numpy as np
+    if len(buckets) < 3:
+        for bucket in buckets:
+            bucket['anomaly'] = []
+        return
+    means = np.array([bucket['mean'] for bucket in buckets])
+    std = means.std()
+    z = (means - means.mean()) / std if std > 0 else np.zeros_like(means)
+    median = np.median(means)
+    # On a near-constant series the MAD collapses and flags rounding noise,
+    # so it is floored at 1% of the median.
+    mad = max(np.median(np.abs(means - median)), 0.01 * abs(median))
+    modified_z = 0.6745 * (means - median) / mad if mad > 0 else np.zeros_like(means)
+    for bucket, z_score, robust_score in zip(buckets, z.tolist(), modified_z.tolist()):
+        bucket['z_score'] = z_score
+        bucket['modified_z_score'] = robust_score
+        bucket['anomaly'] = ([] if abs(z_score) <= z_limit else ['z']) + \
+            ([] if abs(robust_score) <= mad_limit else ['mad'])
+
+
+def iter_results_samples(filenames):
+    for filename in filenames:
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping {filename}: {e}")
+            continue
+        timestamp = os.path.getmtime(filename)
+        for metric in PERCENT_METRICS:
+            if isinstance(data.get(metric), (int, float)):
+                yield metric, timestamp, float(data[metric])
+
+
+def iter_log_samples(filenames):
+    # The log only carries metric values on alert lines.
+    for filename in filenames:
+        try:
+            f = open(filename, errors='replace')
+        except OSError as e:
+            logging.warning(f"Skipping {filename}: {e}")
+            continue
+        with f:
+            for line in f:
+                match = ALERT_LOG_PATTERN.match(line.rstrip('\n'))
+                if match and match.group(2) in PERCENT_METRICS:
+                    timestamp = datetime.datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S').timestamp()
+                    yield match.group(2), timestamp, float(match.group(3))
+
+
+def add_point_samples(report, points, chunk_size):
+    import numpy as np
+    pending = collections.defaultdict(list)
+
+    def flush(metric):
+        rows = np.array(pending.pop(metric))
+        rows = rows[(rows[:, 0] >= report.start) & (rows[:, 0] < report.end)]
+        if len(rows):
+            report.add(metric, rows[:, 0], rows[:, 1], np.ones(len(rows)))
+
+    for metric, timestamp, value in points:
+        pending[metric].append((timestamp, value))
+        if len(pending[metric]) >= chunk_size:
+            flush(metric)
+    for metric in list(pending):
+        flush(metric)
+
+
+def bucket_size(metric):
+    # Approximate bytes held per bucket and metric: the coarse counts plus the
+    # accumulator object itself (measured with tracemalloc).
+    return (len(metric_bins(metric, coarse=True)) - 1) * 8 + 640
+
+
+def build_history_report(store_dir, start, end, bucket_seconds, resolution='raw',
+                         results_files=(), log_files=(), memory_budget=64 * 1024 * 1024):
+    import numpy as np
+    # Half the budget goes to the per-bucket accumulators, half to chunks.
+    buckets = math.ceil((end - start) / bucket_seconds)
+    max_buckets = memory_budget // 2 // sum(bucket_size(metric) for metric in REPORT_METRICS)
+    if buckets > max_buckets:
+        raise ValueError(f"{buckets} buckets do not fit in the memory budget (at most "
+                         f"{max_buckets}); use a larger bucket or memory budget")
+    width = len(store_fields(resolution))
+    # A chunk is copied a handful of times while it is binned; keep that
+    # within the budget.
+    chunk_records = max(1024, memory_budget // 2 // (width * 8 * 8))
+    report = HistoryReport(start, end, bucket_seconds)
+    for chunk in read_record_chunks(store_dir, resolution, start, end, chunk_records):
+        report.add_records(np.frombuffer(chunk, dtype=np.float64).reshape(-1, width), resolution)
+    add_point_samples(report, iter_results_samples(results_files), chunk_records)
+    report.add_alerts(iter_log_samples(log_files))
+    return report.summary()
+
+
+def present_history_report(report, bucket_seconds):
+    def fmt(metric, value):
+        if value is None:
+            return "N/A"
+        if metric in PERCENT_METRICS:
+            return f"{value:.1f}%"
+        return f"{value / 1024:.1f} KB/s"
+
+    if not report:
+        print("No samples found for the requested period.")
+        return
+    from tabulate import tabulate
+    time_format = '%Y-%m-%d %H:%M' if bucket_seconds < 86400 else '%Y-%m-%d'
+    for metric, data in report.items():
+        headers = ["Bucket", "Samples", "Mean", "P50", "P95", "P99", "Max", "Slope/h", "Alerts", "Anomaly"]
+        rows = []
+        for label, stats in [("Overall", data['overall'])] + [
+                (time.strftime(time_format, time.localtime(bucket['bucket_start'])), bucket)
+                for bucket in data['buckets']]:
+            rows.append([label, int(stats['samples']), fmt(metric, stats['mean']), fmt(metric, stats['p50']),
+                         fmt(metric, stats['p95']), fmt(metric, stats['p99']), fmt(metric, stats['max']),
+                         f"{stats['slope_per_hour']:+.3g}", stats['alerts'], ", ".join(stats.get('anomaly', []))])
+        print(metric)
+        print(tabulate(rows, headers, tablefmt="grid"))
+
+
+def parse_report_arguments(argv):
+    parser = argparse.ArgumentParser(prog='system-analyzer.py report',
+                                     description='Summarise stored samples over time')
+    parser.add_argument('--store', default='samples',
+                        help='directory of the sample store (default: samples)')
+    parser.add_argument('--since', type=parse_interval, default=7 * 86400,
+                        help='how far back to report, e.g. 12h, 7d, 4w (default: 7d)')
+    parser.add_argument('--until', type=parse_interval,
+                        help='end the report this long ago (default: now)')
+    parser.add_argument('--bucket', type=parse_interval, default=86400,
+                        help='time bucket size, e.g. 1h, 1d (default: 1d)')
+    parser.add_argument('--resolution', choices=['raw', '1m', '1h'], default='raw',
+                        help='sample store series to read (default: raw)')
+    parser.add_argument('--results', nargs='+', default=[], metavar='FILE',
+                        help='past results.json files to include')
+    parser.add_argument('--logs', nargs='+', default=[], metavar='FILE',
+                        help='log files whose alert lines are counted per bucket')
+    parser.add_argument('--memory-budget', type=int, default=64,
+                        help='approximate memory budget in MB, split between streamed chunks and '
+                             'per-bucket histograms (default: 64)')
+    parser.add_argument('--json', metavar='FILE',
+                        help='also write the full report, including histograms, to FILE')
+    return parser.parse_args(argv)
+
+
+def run_report(argv):
+    args = parse_report_arguments(argv)
+    end = time.time() - (args.until or 0)
+    start = end - args.since
+    # Align buckets to whole multiples of the bucket size in epoch time.
+    start -= start % args.bucket
+    try:
+        report = build_history_report(args.store, start, end, args.bucket, args.resolution,
+                                      args.results, args.logs, args.memory_budget * 1024 * 1024)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    present_history_report(report, args.bucket)
+    if args.json:
+        export_to_json(report, args.json)
+
+
+def parse_interval(value):
+    units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+    value = value.strip().lower()
+    for suffix in sorted(units, key=len, reverse=True):
+        if value.endswith(suffix):
+            number, scale = value[:-len(suffix)], units[suffix]
+            break
+    else:
+        number, scale = value, 1
+    try:
+        seconds = float(number) * scale
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid interval: {value!r}")
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError("interval must be positive")
+    return seconds
+
+
+def collect_sample(own_process):
+    # All psutil reads for one tick, taken back to back.
+    started = time.perf_counter()
+    cpu_usage = psutil.cpu_percent(interval=None)
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    network = psutil.net_io_counters()
+    with own_process.oneshot():
+        own_cpu = own_process.cpu_times()
+        own_rss = own_process.memory_info().rss
+    sample = {
+        'timestamp': time.time(),
+        'cpu_usage': cpu_usage,
+        'memory_usage': memory.percent,
+        'disk_usage': disk.percent,
+        'bytes_sent': network.bytes_sent,
+        'bytes_recv': network.bytes_recv,
+        'collector_cpu_seconds': own_cpu.user + own_cpu.system,
+        'collector_rss': own_rss,
+    }
+    sample['collect_ms'] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def collector_overhead(samples):
+    # CPU share of one core and RSS of the collector over the buffered window.
+    if len(samples) < 2:
+        return None
+    first, last = samples[0], samples[-1]
+    elapsed = last['timestamp'] - first['timestamp']
+    if elapsed <= 0:
+        return None
+    cpu_seconds = last['collector_cpu_seconds'] - first['collector_cpu_seconds']
+    ticks = len(samples) - 1
+    return {
+        'ticks': ticks,
+        'cpu_percent_of_core': cpu_seconds / elapsed * 100,
+        'cpu_ms_per_tick': cpu_seconds / ticks * 1000,
+        'mean_collect_ms': sum(s['collect_ms'] for s in samples) / len(samples),
+        'max_collect_ms': max(s['collect_ms'] for s in samples),
+        'rss_mb': last['collector_rss'] / (1024 * 1024)
+    }
+
+
+def log_overhead(overhead):
+    logging.info(
+        f"Collector overhead over {overhead['ticks']} ticks: "
+        f"{overhead['cpu_percent_of_core']:.3f}% of one core, "
+        f"{overhead['cpu_ms_per_tick']:.3f} ms CPU/tick, "
+        f"collect {overhead['mean_collect_ms']:.3f} ms mean / "
+        f"{overhead['max_collect_ms']:.3f} ms max, "
+        f"RSS {overhead['rss_mb']:.1f} MB")
+
+
+def run_fixed_rate(interval, callback, stop_event):
+    # Deadlines are derived from the start time, so sleep jitter never
+    # accumulates; ticks that are overrun are skipped rather than bunched.
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        callback()
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay < 0:
+            missed = int(-delay // interval) + 1
+            logging.warning(f"Collector overran its interval, skipping {missed} tick(s)")
+            next_tick += missed * interval
+            delay = next_tick - time.monotonic()
+        stop_event.wait(delay)
+
+
+def run_daemon(interval, buffer_size=3600, report_every=60, store=None, top_n=5, top_every=10,
+               alerts=None, shipper=None, rates_every=10):
+    samples = collections.deque(maxlen=buffer_size)
+    own_process = psutil.Process()
+    tracker = CounterTracker()
+    stop_event = threading.Event()
+    ticks = 0
+    latest_top = None
+
+    def stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # The first cpu_percent() call has no reference point and always returns 0.
+    psutil.cpu_percent(interval=None)
+    logging.info(f"Daemon started: interval {interval}s, buffer {buffer_size} samples")
+
+    def run_stage(name, func, *args):
+        # A failing stage (a transient psutil error, ENOSPC from the store)
+        # is logged and skipped; the sampler itself keeps running.
+        try:
+            with timed(name):
+                return func(*args)
+        except Exception as e:
+            logging.error(f"Daemon {name} failed: {e}")
+            return None
+
+    def tick():
+        nonlocal ticks, latest_top
+        with timed('tick'):
+            sample = run_stage('collect_sample', collect_sample, own_process)
+            if sample is not None:
+                if rates_every and ticks % rates_every == 0:
+                    rates = run_stage('device_rates', get_device_rates, tracker)
+                    if rates is not None:
+                        sample.update(summarize_device_rates(rates))
+                if top_n and top_every and ticks % top_every == 0:
+                    top_processes = run_stage('top_processes', get_top_processes, top_n)
+                    if top_processes is not None:
+                        sample['top_processes'] = latest_top = top_processes
+                samples.append(sample)
+                if store:
+                    run_stage('store', store.append, sample)
+                if shipper:
+                    run_stage('ship', shipper.add, sample)
+                if alerts:
+                    run_stage('alerts', lambda: notify_alerts(alerts.observe(sample), latest_top))
+        ticks += 1
+        if report_every and ticks % report_every == 0:
+            overhead = collector_overhead(list(samples)[-(report_every + 1):])
+            if overhead:
+                log_overhead(overhead)
+
+    try:
+        run_fixed_rate(interval, tick, stop_event)
+    finally:
+        if store:
+            store.close()
+        if shipper:
+            shipper.close()
+
+    overhead = collector_overhead(samples)
+    if overhead:
+        log_overhead(overhead)
+        print(f"Collector overhead: {overhead['cpu_percent_of_core']:.3f}% of one core, "
+              f"{overhead['mean_collect_ms']:.3f} ms per tick, RSS {overhead['rss_mb']:.1f} MB")
+    logging.info(f"Daemon stopped after {ticks} ticks")
+    return samples
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description='System Analyzer Tool')
+    parser.add_argument('url', nargs='?',
+                        help='URL or IP address to measure response time for')
+    parser.add_argument('--daemon', action='store_true',
+                        help='sample continuously without prompting')
+    parser.add_argument('--interval', type=parse_interval, default=1.0,
+                        help='sampling interval in daemon mode, e.g. 500ms, 1s, 1m (default: 1s)')
+    parser.add_argument('--buffer-size', type=int, default=3600,
+                        help='number of samples kept in memory in daemon mode (default: 3600)')
+    parser.add_argument('--report-every', type=int, default=60,
+                        help='log collector overhead every N ticks, 0 to disable (default: 60)')
+    parser.add_argument('--top', type=int, default=5,
+                        help='number of processes to report per metric, 0 to disable (default: 5)')
+    parser.add_argument('--rate-window', type=float, default=1.0,
+                        help='seconds between the two sweeps behind device and process rates '
+                             'in a one-shot report, 0 to 4, 0 to skip rates (default: 1)')
+    parser.add_argument('--rates-every', type=int, default=10,
+                        help='compute device rates every N ticks in daemon mode, 0 to disable '
+                             '(default: 10)')
+    parser.add_argument('--top-every', type=int, default=10,
+                        help='sample top processes every N ticks in daemon mode (default: 10)')
+    parser.add_argument('--alert-rules',
+                        help='JSON file with alert rules (default: usage above 75%% for CPU, memory and disk)')
+    parser.add_argument('--store', default='samples',
+                        help='directory of the append-only sample store (default: samples)')
+    parser.add_argument('--no-store', action='store_true',
+                        help='do not record samples in the sample store')
+    parser.add_argument('--fsync-interval', type=parse_interval, default=5.0,
+                        help='how often the sample store is fsynced (default: 5s)')
+    parser.add_argument('--updates-ttl', type=parse_interval, default=6 * 3600,
+                        help='reuse the last OS update check for this long (default: 6h)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore cached system information and update checks')
+    parser.add_argument('--instrument', action='store_true',
+                        help='record per-collector timing histograms and log them on exit')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='write cProfile stats for the whole run to FILE')
+    parser.add_argument('--tracemalloc', metavar='FILE',
+                        help='write the top memory allocations of the run to FILE')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='benchmark every collector and compare against the baseline')
+    parser.add_argument('--benchmark-iterations', type=int, default=20,
+                        help='timed iterations per collector (default: 20)')
+    parser.add_argument('--baseline', default=BENCHMARK_BASELINE,
+                        help=f'benchmark baseline file (default: {BENCHMARK_BASELINE})')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the benchmark results as the new baseline')
+    parser.add_argument('--regression-threshold', type=float, default=0.25,
+                        help='relative slowdown that fails the benchmark (default: 0.25)')
+    parser.add_argument('--ship', metavar='HOST[:PORT]',
+                        help=f'in daemon mode, ship samples to an aggregator (default port: {FLEET_PORT})')
+    parser.add_argument('--ship-batch', type=int, default=60,
+                        help='samples per shipped batch (default: 60)')
+    parser.add_argument('--spool-dir', default='spool',
+                        help='where batches are kept while the aggregator is unreachable (default: spool)')
+    parser.add_argument('--aggregator', action='store_true',
+                        help='run the fleet aggregator')
+    parser.add_argument('--fleet-port', type=int, default=FLEET_PORT,
+                        help=f'port the aggregator receives batches on (default: {FLEET_PORT})')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                        help=f'port the aggregator serves /metrics on (default: {METRICS_PORT})')
+    parser.add_argument('--throughput-server', action='store_true',
+                        help='run the throughput test server')
+    parser.add_argument('--throughput', metavar='HOST',
+                        help='measure throughput to a host running --throughput-server')
+    parser.add_argument('--port', type=int, default=THROUGHPUT_PORT,
+                        help=f'throughput test port (default: {THROUGHPUT_PORT})')
+    parser.add_argument('--streams', type=int, default=4,
+                        help='parallel TCP streams for the throughput test (default: 4)')
+    parser.add_argument('--duration', type=parse_interval, default=5.0,
+                        help=f'duration of each throughput direction, at most '
+                             f'{THROUGHPUT_MAX_DURATION}s (default: 5s)')
+    parser.add_argument('--direction', choices=['download', 'upload', 'both'], default='both',
+                        help='throughput direction to test (default: both)')
+    parser.add_argument('--probe', nargs='+', metavar='URL', default=[],
+                        help='probe the response time of one or more targets concurrently')
+    parser.add_argument('--probe-file',
+                        help='file with one probe target per line')
+    parser.add_argument('--probe-requests', type=int, default=10,
+                        help='requests per probe target (default: 10)')
+    parser.add_argument('--probe-concurrency', type=int, default=4,
+                        help='keep-alive connections per probe target (default: 4)')
+    parser.add_argument('--probe-timeout', type=float, default=5,
+                        help='socket timeout in seconds for probes (default: 5)')
+    parser.add_argument('--probe-max-time', type=float, default=10,
+                        help='time limit in seconds for each probe connection (default: 10)')
+    args = parser.parse_args(argv)
+    # The window has to fit inside the device_rates collector's deadline.
+    if not 0 <= args.rate_window <= 4:
+        parser.error('--rate-window must be between 0 and 4 seconds')
+    # The server stops every stream after THROUGHPUT_MAX_DURATION.
+    if not 0 < args.duration <= THROUGHPUT_MAX_DURATION:
+        parser.error(f'--duration must be between 0 and {THROUGHPUT_MAX_DURATION} seconds')
+    if args.streams < 1:
+        parser.error('--streams must be at least 1')
+    return args
+
+
 def main():
+    if sys.argv[1:2] == ['report']:
+        run_report(sys.argv[2:])
+        return
+    args = parse_arguments(sys.argv[1:])
+    setup_logging()
+    if args.instrument:
+        enable_instrumentation()
+    profiler = start_profiling(args.profile, args.tracemalloc)
+    try:
+        analyze(args)
+    finally:
+        stop_profiling(profiler, args.profile, args.tracemalloc)
+        if args.instrument:
+            log_timing_summary()
+
+
+def analyze(args):
     try:
-        url = sys.argv[1] if len(sys.argv) == 2 else input("Enter a URL: ")
-        response_time = measure_system_response(url)
-        if response_time is None:
+        alert_rules = load_alert_rules(args.alert_rules) if args.alert_rules else DEFAULT_ALERT_RULES
+    except (OSError, ValueError) as e:
+        print(f"Error loading alert rules: {e}")
+        sys.exit(1)
+    if args.daemon:
+        store = None if args.no_store else SampleStore(args.store, args.fsync_interval)
+        shipper = FleetShipper(parse_address(args.ship, FLEET_PORT), args.spool_dir,
+                               args.ship_batch) if args.ship else None
+        run_daemon(args.interval, args.buffer_size, args.report_every, store,
+                   args.top, args.top_every, AlertEngine(alert_rules), shipper, args.rates_every)
+        return
+    if args.benchmark:
+        if not benchmark(args.benchmark_iterations, args.baseline, args.save_baseline,
+                         args.regression_threshold):
+            sys.exit(1)
+        return
+    if args.aggregator:
+        print(f"Aggregator receiving on port {args.fleet_port}, "
+              f"serving /metrics on port {args.metrics_port}. Press Ctrl+C to stop.")
+        try:
+            asyncio.run(FleetAggregator().serve(port=args.fleet_port, metrics_port=args.metrics_port))
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.throughput_server:
+        server, thread = start_throughput_server(port=args.port)
+        print(f"Throughput server listening on port {args.port}. Press Ctrl+C to stop.")
+        try:
+            thread.join()
+        except KeyboardInterrupt:
+            server.close()
+        return
+    if args.throughput:
+        directions = ('download', 'upload') if args.direction == 'both' else (args.direction,)
+        results = run_throughput_test(args.throughput, args.port, args.streams,
+                                      args.duration, directions)
+        present_throughput_results(results)
+        export_to_json(results, 'throughput_results.json')
+        return
+    if args.probe or args.probe_file:
+        targets = args.probe + (read_targets(args.probe_file) if args.probe_file else [])
+        results = probe_targets(targets, args.probe_requests,
+                                args.probe_concurrency, args.probe_timeout,
+                                max_time=args.probe_max_time)
+        present_probe_results(results)
+        export_to_json(results, 'probe_results.json')
+        return
+
+    try:
+        if not args.url and not sys.stdin.isatty():
+            print("A URL is required on the command line when not running interactively.")
+            sys.exit(1)
+        url = args.url or input("Enter a URL: ")
+        context = {
+            'url': url,
+            'updates_ttl': 0 if args.no_cache else args.updates_ttl,
+            'use_cache': not args.no_cache,
+            'speed_test': ask_speed_test(),
+            'top_n': args.top,
+            'rate_window': args.rate_window
+        }
+        results = {}
+        for name, result in run_collectors(context, REPORT_COLLECTORS):
+            results[name] = result
+            logging.info(f"Collector {name}: {result['status']} in {result['elapsed']:.3f}s")
+            if result['status'] != 'ok':
+                print(f"{name}: {result['status']}")
+
+        response_time = results['response_time']['value']
+        if response_time is None and results['response_time']['status'] == 'ok':
+            # Without a terminal there is no one to ask; carry on with the report.
             user_choice = input(
-                "The URL is unreachable. Continue (C) or enter different URL (D)? ").strip().lower()
+                "The URL is unreachable. Continue (C) or enter different URL (D)? ").strip().lower() \
+                if sys.stdin.isatty() else 'c'
             if user_choice == 'c':
                 print("Continuing with the rest of the script.")
             elif user_choice == 'd':
@@ -232,16 +2705,31 @@ def main():
                 print("Invalid choice. Exiting.")
                 sys.exit(1)
 
-        updates = check_os_updates()
-        cpu_usage = get_cpu_usage()
-        memory_usage = get_memory_usage()
-        disk_usage = get_disk_usage()
-        network_info = get_network_information()
-        system_info = get_system_info()
-        speed_info = network_speed_test()
+        updates = results['updates']['value']
+        cpu_usage = results['cpu_usage']['value']
+        # The first psutil.cpu_percent() call in a fresh process covers only a
+        # few milliseconds; the device-rate window gives a real reading. Without
+        # one, CPU usage is shown but not stored or alerted on.
+        cores = (results['device_rates']['value'] or {}).get('cpu_cores')
+        cpu_measured = bool(cores)
+        if cpu_measured:
+            cpu_usage = round(statistics.fmean(cores), 1)
+        memory_usage = results['memory_usage']['value']
+        disk_usage = results['disk_usage']['value']
+        network_info = results['network_info']['value']
+        system_info = results['system_info']['value']
+        speed_info = results['speed_info']['value']
+        statuses = {name: result['status'] for name, result in results.items()}
 
         present_results(cpu_usage, memory_usage, updates, response_time,
-                        disk_usage, network_info, system_info, speed_info)
+                        disk_usage, network_info, system_info, speed_info, statuses,
+                        alert_thresholds(alert_rules))
+        if results['device_rates']['value']:
+            present_device_rates(results['device_rates']['value'])
+        if args.top and results['top_processes']['value']:
+            present_top_processes(results['top_processes']['value'], args.rate_window <= 0)
+        if updates and sys.stdin.isatty():
+            prompt_os_upgrade(get_update_commands()[2])
 
         export_to_json({
             'cpu_usage': cpu_usage,
@@ -251,12 +2739,35 @@ def main():
             'system_info': system_info,
             'speed_info': speed_info,
             'response_time': response_time,
-            'updates': updates
+            'updates': updates,
+            'top_processes': results['top_processes']['value'],
+            'timings': timing_summary(),
+            'device_rates': results['device_rates']['value'],
+            'collector_status': statuses
         })
 
-        if cpu_usage > 75 or memory_usage > 75 or disk_usage > 75:
-            send_notification(
-                "High Resource Usage", f"CPU: {cpu_usage}%, Memory: {memory_usage}% Disk: {disk_usage}%")
+        if not args.no_store:
+            # A running daemon owns the store; its samples already cover this run.
+            try:
+                store = SampleStore(args.store, args.fsync_interval, wait=False)
+            except OSError as e:
+                logging.info(f"Not storing this run's sample: {e}")
+            else:
+                store.append({
+                    'timestamp': time.time(),
+                    'cpu_usage': cpu_usage if cpu_measured else float('nan'),
+                    'memory_usage': memory_usage,
+                    'disk_usage': disk_usage,
+                    'bytes_sent': network_info['kilobytes_sent'] * 1024,
+                    'bytes_recv': network_info['kilobytes_received'] * 1024
+                })
+                store.close()
+
+        notify_alerts(AlertEngine(alert_rules).observe({
+            'cpu_usage': cpu_usage if cpu_measured else None,
+            'memory_usage': memory_usage,
+            'disk_usage': disk_usage
+        }), results['top_processes']['value'])
 
     except KeyboardInterrupt:
         print("\nExiting system response analyzer...")
@@ -0,0 +1,12 @@
+import importlib.util
+import pathlib
+import sys
+
+# system-analyzer.py is a script, not a package, so it is loaded by path and
+# registered under an importable name for the test modules.
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / 'system-analyzer.py'
+
+spec = importlib.util.spec_from_file_location('system_analyzer', SCRIPT)
+system_analyzer = importlib.util.module_from_spec(spec)
+sys.modules['system_analyzer'] = system_analyzer
+spec.loader.exec_module(system_analyzer)
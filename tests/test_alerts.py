@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+import system_analyzer as sa
+
+
+def feed(engine, metric, values, start=0.0, step=1.0):
+    events = []
+    for i, value in enumerate(values):
+        events += engine.observe({'timestamp': start + i * step, metric: value})
+    return events
+
+
+def states(events):
+    return [(event['timestamp'], event['state']) for event in events]
+
+
+def test_fires_and_resolves_with_hysteresis():
+    engine = sa.AlertEngine([{'name': 'cpu', 'metric': 'cpu_usage', 'enter': 80, 'exit': 60}])
+    events = feed(engine, 'cpu_usage', [50, 85, 90, 70, 65, 55, 85])
+    # 70 and 65 stay above the exit threshold, so the alert keeps firing.
+    assert states(events) == [(1, 'firing'), (5, 'resolved'), (6, 'firing')]
+
+
+def test_sustain_requires_a_continuous_breach():
+    engine = sa.AlertEngine([{'name': 'cpu', 'metric': 'cpu_usage', 'enter': 80,
+                              'sustain': 3}])
+    events = feed(engine, 'cpu_usage', [90, 90, 50, 90, 90, 90, 90])
+    assert states(events) == [(6, 'firing')]
+
+
+def test_cooldown_suppresses_repeat_notifications():
+    engine = sa.AlertEngine([{'name': 'cpu', 'metric': 'cpu_usage', 'enter': 80,
+                              'cooldown': 10}])
+    events = feed(engine, 'cpu_usage', [90, 50, 90, 50, 90, 50, 90] + [50] * 5 + [90])
+    firing = [(event['timestamp'], event['notify']) for event in events
+              if event['state'] == 'firing']
+    assert firing == [(0, True), (2, False), (4, False), (6, False), (12, True)]
+
+
+def test_below_rule():
+    engine = sa.AlertEngine([{'name': 'low', 'metric': 'memory_usage', 'enter': 10,
+                              'exit': 20, 'above': False}])
+    events = feed(engine, 'memory_usage', [30, 5, 15, 25])
+    assert states(events) == [(1, 'firing'), (3, 'resolved')]
+
+
+def test_missing_metric_is_ignored():
+    engine = sa.AlertEngine(sa.DEFAULT_ALERT_RULES)
+    assert engine.observe({'timestamp': 0, 'cpu_usage': 99})[0]['rule'] == 'High CPU usage'
+    assert engine.observe({'timestamp': 1}) == []
+
+
+def test_ewma_smooths_a_single_spike():
+    engine = sa.AlertEngine([{'name': 'cpu', 'metric': 'cpu_usage', 'enter': 80,
+                              'stat': 'ewma', 'alpha': 0.3}])
+    assert feed(engine, 'cpu_usage', [10, 100, 10]) == []
+
+
+def test_rate_stat_over_window():
+    stat = sa.RateStat({'seconds': 10})
+    assert stat.update(0, 100) == 0.0
+    assert stat.update(5, 150) == 10.0
+    # The sample at t=0 has left the window.
+    assert stat.update(15, 200) == 5.0
+
+
+def test_percentile_stat_evicts_old_samples():
+    stat = sa.PercentileStat({'seconds': 10, 'percentile': 50, 'bins': 10})
+    for t in range(10):
+        stat.update(t, 95)
+    assert stat.update(10, 5) == 100
+    for t in range(11, 30):
+        result = stat.update(t, 5)
+    assert result == 10
+
+
+def test_load_alert_rules_validates(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([{'name': 'x', 'metric': 'cpu_usage'}]))
+    with pytest.raises(ValueError, match="missing 'enter'"):
+        sa.load_alert_rules(str(path))
+    path.write_text(json.dumps([{'name': 'x', 'metric': 'cpu_usage', 'enter': 1,
+                                 'stat': 'median'}]))
+    with pytest.raises(ValueError, match='unknown stat'):
+        sa.load_alert_rules(str(path))
+    path.write_text(json.dumps({'name': 'x', 'metric': 'cpu_usage', 'enter': 1}))
+    with pytest.raises(ValueError, match='must contain a list'):
+        sa.load_alert_rules(str(path))
+    path.write_text(json.dumps(['cpu_usage']))
+    with pytest.raises(ValueError, match='not an object'):
+        sa.load_alert_rules(str(path))
+
+
+@pytest.mark.parametrize('rule, valid', [
+    ({'enter': 80, 'exit': 60}, True),
+    ({'enter': 80, 'exit': 90}, False),
+    ({'enter': 10, 'exit': 20, 'above': False}, True),
+    ({'enter': 10, 'exit': 5, 'above': False}, False),
+])
+def test_exit_must_be_on_the_resolving_side(tmp_path, rule, valid):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([dict(rule, name='x', metric='cpu_usage')]))
+    if valid:
+        assert sa.load_alert_rules(str(path))
+    else:
+        with pytest.raises(ValueError, match='never resolve'):
+            sa.load_alert_rules(str(path))
+
+
+def test_alert_thresholds_take_the_lowest_above_rule():
+    rules = [{'name': 'a', 'metric': 'cpu_usage', 'enter': 90},
+             {'name': 'b', 'metric': 'cpu_usage', 'enter': 70},
+             {'name': 'c', 'metric': 'disk_usage', 'enter': 5, 'above': False}]
+    assert sa.alert_thresholds(rules) == {'cpu_usage': 70}
+
+
+def test_firing_alert_names_top_processes(monkeypatch, caplog):
+    sent = []
+    monkeypatch.setattr(sa, 'send_notification', lambda title, message: sent.append(message))
+    top = {'cpu_percent': [{'pid': 42, 'name': 'hog', 'cpu_percent': 97.5},
+                           {'pid': 7, 'name': 'idle', 'cpu_percent': 1.0}],
+           'rss': []}
+    engine = sa.AlertEngine(sa.DEFAULT_ALERT_RULES)
+    with caplog.at_level('WARNING'):
+        sa.notify_alerts(engine.observe({'timestamp': 0, 'cpu_usage': 99, 'memory_usage': 90}), top)
+    assert sent == ["High CPU usage: 99.0 (top: hog (42) 97.5%, idle (7) 1.0%), "
+                    "High memory usage: 90.0"]
+    assert "Top processes for High CPU usage: hog (42) 97.5%, idle (7) 1.0%" in caplog.text
+    # The alert line itself still matches what the report parses.
+    alert_line = next(record.getMessage() for record in caplog.records
+                      if record.getMessage().startswith('Alert High CPU'))
+    assert sa.ALERT_LOG_PATTERN.match(f"2026-01-01 00:00:00,000:WARNING:{alert_line}")
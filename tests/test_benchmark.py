@@ -0,0 +1,43 @@
+import json
+
+import system_analyzer as sa
+
+
+def result(wall_ms, cpu_ms=1.0, alloc_kb=100.0):
+    return {'wall_ms': wall_ms, 'wall_p95_ms': wall_ms, 'cpu_ms': cpu_ms, 'alloc_kb': alloc_kb}
+
+
+def test_compare_benchmarks_threshold_and_floors():
+    baseline = {'cpu_usage': result(1.0), 'tiny': result(0.01), 'gone': result(1.0)}
+    results = {
+        # 50% slower: a regression at a 25% threshold.
+        'cpu_usage': result(1.5),
+        # Five times slower, but below the 0.05 ms noise floor.
+        'tiny': result(0.05),
+        # No baseline entry yet.
+        'new': result(100.0),
+    }
+    assert sa.compare_benchmarks(results, baseline, 0.25) == ["cpu_usage wall_ms: 1.000 -> 1.500"]
+    assert sa.compare_benchmarks(results, baseline, 0.6) == []
+    heavier = {'cpu_usage': result(1.0, alloc_kb=200.0)}
+    assert sa.compare_benchmarks(heavier, baseline, 0.25) == ["cpu_usage alloc_kb: 100.000 -> 200.000"]
+
+
+def test_benchmark_exit_status_follows_regressions(tmp_path, monkeypatch, capsys):
+    baseline_file = str(tmp_path / 'benchmarks' / 'baseline.json')
+    measured = {'cpu_usage': result(1.0)}
+    monkeypatch.setattr(sa, 'run_benchmarks', lambda iterations: dict(measured))
+
+    assert sa.benchmark(3, baseline_file, save_baseline=True, threshold=0.25)
+    with open(baseline_file) as f:
+        assert json.load(f) == measured
+
+    assert sa.benchmark(3, baseline_file, save_baseline=False, threshold=0.25)
+    measured['cpu_usage'] = result(2.0)
+    assert not sa.benchmark(3, baseline_file, save_baseline=False, threshold=0.25)
+    assert "Regression: cpu_usage wall_ms" in capsys.readouterr().out
+
+
+def test_benchmark_targets_include_cached_update_check():
+    targets = sa.benchmark_targets('http://127.0.0.1:1/')
+    assert 'updates_cached' in targets and 'full_tick' in targets
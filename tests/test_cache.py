@@ -0,0 +1,101 @@
+import subprocess
+import sys
+import types
+
+import pytest
+
+import system_analyzer as sa
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    monkeypatch.setattr(sa, '_static_info', None)
+    return tmp_path
+
+
+@pytest.fixture
+def cpuinfo_calls(monkeypatch):
+    calls = []
+
+    def get_cpu_info():
+        calls.append(1)
+        return {'brand_raw': 'Test CPU'}
+
+    monkeypatch.setitem(sys.modules, 'cpuinfo', types.SimpleNamespace(get_cpu_info=get_cpu_info))
+    return calls
+
+
+def static_info_at(monkeypatch, boot_time):
+    monkeypatch.setattr(sa.psutil, 'boot_time', lambda: boot_time)
+    monkeypatch.setattr(sa, '_static_info', None)
+    return sa.get_static_info()
+
+
+def test_static_info_is_cached_per_boot(monkeypatch, cpuinfo_calls):
+    assert static_info_at(monkeypatch, 1000.0)['Processor'] == 'Test CPU'
+    # Boot time derived from uptime jitters by up to a second.
+    static_info_at(monkeypatch, 1000.8)
+    static_info_at(monkeypatch, 999.2)
+    assert len(cpuinfo_calls) == 1
+    static_info_at(monkeypatch, 5000.0)
+    assert len(cpuinfo_calls) == 2
+
+
+def test_no_cache_recomputes(monkeypatch, cpuinfo_calls):
+    static_info_at(monkeypatch, 1000.0)
+    sa.get_static_info(use_cache=False)
+    assert len(cpuinfo_calls) == 2
+
+
+def test_unreadable_cache_is_ignored(cache_home, monkeypatch, cpuinfo_calls):
+    (cache_home / 'system-analyzer').mkdir()
+    (cache_home / 'system-analyzer' / 'static_info.json').write_text('{not json')
+    assert static_info_at(monkeypatch, 1000.0)['Processor'] == 'Test CPU'
+    assert sa.read_cache('static_info')['boot_time'] == 1000.0
+
+
+@pytest.fixture
+def update_checks(monkeypatch):
+    runs = []
+
+    def run(command, **kwargs):
+        runs.append(command)
+        return subprocess.CompletedProcess(command, 0, '', '')
+
+    monkeypatch.setattr(sa, 'get_update_commands',
+                        lambda: ("Checking.", ['check-updates'], ['install-updates']))
+    monkeypatch.setattr(sa, 'is_raspberry_pi', lambda: False)
+    monkeypatch.setattr(sa.subprocess, 'run', run)
+    return runs
+
+
+def test_update_check_is_reused_within_ttl(monkeypatch, update_checks):
+    now = [10_000.0]
+    monkeypatch.setattr(sa.time, 'time', lambda: now[0])
+    assert sa.check_os_updates(ttl=60, interactive=False)
+    now[0] += 30
+    assert sa.check_os_updates(ttl=60, interactive=False)
+    assert update_checks == [['check-updates']]
+    now[0] += 31
+    sa.check_os_updates(ttl=60, interactive=False)
+    assert len(update_checks) == 2
+    # A ttl of 0 (--no-cache) always runs the check.
+    sa.check_os_updates(ttl=0, interactive=False)
+    assert len(update_checks) == 3
+
+
+def test_upgrade_invalidates_update_cache(monkeypatch, update_checks):
+    assert sa.check_os_updates(ttl=3600, interactive=False)
+    monkeypatch.setattr(sa.sys.stdin, 'isatty', lambda: True, raising=False)
+    monkeypatch.setattr('builtins.input', lambda prompt: 'yes')
+    sa.prompt_os_upgrade(['install-updates'])
+    assert update_checks == [['check-updates'], ['install-updates']]
+    sa.check_os_updates(ttl=3600, interactive=False)
+    assert update_checks[-1] == ['check-updates']
+
+
+def test_prompts_are_skipped_without_a_terminal(monkeypatch):
+    monkeypatch.setattr(sa.sys.stdin, 'isatty', lambda: False, raising=False)
+    monkeypatch.setattr('builtins.input', lambda prompt: pytest.fail('prompted'))
+    assert sa.ask_speed_test() is False
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import system_analyzer as sa
+
+
+def register(monkeypatch, name, func, cost=sa.EXPENSIVE, deadline=1, default=None):
+    monkeypatch.setitem(sa.COLLECTORS, name, {'name': name, 'func': func, 'cost': cost,
+                                             'deadline': deadline, 'default': default})
+
+
+def test_results_and_timeouts(monkeypatch):
+    release = threading.Event()
+    register(monkeypatch, 'fast', lambda context: context['value'])
+    register(monkeypatch, 'cheap', lambda context: 'inline', cost=sa.CHEAP)
+    register(monkeypatch, 'stuck', lambda context: release.wait(), deadline=0.2, default='late')
+    register(monkeypatch, 'broken', lambda context: 1 / 0, default=-1)
+
+    started = time.monotonic()
+    results = dict(sa.run_collectors({'value': 42}, ['fast', 'cheap', 'stuck', 'broken']))
+    release.set()
+    assert time.monotonic() - started < 1
+    assert results['fast']['value'] == 42 and results['fast']['status'] == 'ok'
+    assert results['cheap']['value'] == 'inline'
+    assert results['stuck'] == {'value': 'late', 'status': 'timed out',
+                                'elapsed': results['stuck']['elapsed']}
+    assert results['broken']['value'] == -1 and results['broken']['status'] == 'error'
+
+
+def test_overrunning_collector_does_not_block_exit(tmp_path):
+    script = textwrap.dedent(f"""
+        import importlib.util, time
+        spec = importlib.util.spec_from_file_location('sa', {str(sa.__file__)!r})
+        sa = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sa)
+        sa.COLLECTORS['hang'] = {{'name': 'hang', 'func': lambda context: time.sleep(60),
+                                 'cost': sa.EXPENSIVE, 'deadline': 0.2, 'default': None}}
+        print(dict(sa.run_collectors({{}}, ['hang']))['hang']['status'])
+    """)
+    started = time.monotonic()
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            timeout=30)
+    assert output.stdout.strip() == 'timed out'
+    assert time.monotonic() - started < 20
@@ -0,0 +1,116 @@
+import collections
+import math
+import signal
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+import system_analyzer as sa
+
+
+def test_first_sample_has_no_deltas():
+    tracker = sa.CounterTracker()
+    assert tracker.deltas('nic', {'eth0': [100, 10]}, 0.0) is None
+
+
+def test_deltas_and_elapsed():
+    tracker = sa.CounterTracker()
+    tracker.deltas('nic', {'eth0': [100, 10], 'lo': [5, 5]}, 0.0)
+    names, delta, elapsed = tracker.deltas('nic', {'eth0': [300, 20], 'lo': [5, 6]}, 2.0)
+    assert names == ('eth0', 'lo')
+    assert delta.tolist() == [[200, 10], [0, 1]]
+    assert elapsed == 2.0
+
+
+def test_decrease_is_a_reset_not_a_wrap():
+    tracker = sa.CounterTracker()
+    tracker.deltas('nic', {'eth0': [1000, 10]}, 0.0)
+    _, delta, _ = tracker.deltas('nic', {'eth0': [50, 20]}, 1.0)
+    assert math.isnan(delta[0, 0])
+    assert delta[0, 1] == 10
+
+
+def test_clamped_decrease_is_zero():
+    tracker = sa.CounterTracker()
+    tracker.deltas('cpu', {0: [10.5, 3.0]}, 0.0, clamp=True)
+    _, delta, _ = tracker.deltas('cpu', {0: [10.49, 4.0]}, 1.0, clamp=True)
+    assert delta.tolist() == [[0.0, 1.0]]
+
+
+def test_devices_appearing_and_vanishing():
+    tracker = sa.CounterTracker()
+    tracker.deltas('disk', {'sda': [1], 'sdb': [1]}, 0.0)
+    names, delta, _ = tracker.deltas('disk', {'sdb': [4], 'sdc': [9]}, 1.0)
+    # sda vanished; sdc has no baseline until the next sample.
+    assert names == ('sdb',)
+    assert delta.tolist() == [[3]]
+    names, delta, _ = tracker.deltas('disk', {'sdb': [5], 'sdc': [10]}, 2.0)
+    assert names == ('sdb', 'sdc')
+    assert delta.tolist() == [[1], [1]]
+
+
+def test_no_time_elapsed():
+    tracker = sa.CounterTracker()
+    tracker.deltas('nic', {'eth0': [1]}, 5.0)
+    assert tracker.deltas('nic', {'eth0': [2]}, 5.0) is None
+
+
+def test_device_rates_exclude_guest_time(monkeypatch):
+    fields = ('user', 'nice', 'system', 'idle', 'iowait', 'guest', 'guest_nice')
+    cputimes = collections.namedtuple('scputimes', fields)
+    readings = iter([
+        [cputimes(0, 0, 0, 0, 0, 0, 0)],
+        # 50s user (of which 40s guest), 50s idle: 50% busy, not 60%.
+        [cputimes(50, 0, 0, 50, 0, 40, 0)],
+    ])
+    monkeypatch.setattr(sa.psutil, 'cpu_times', lambda percpu: next(readings))
+    monkeypatch.setattr(sa.psutil, 'net_io_counters', lambda pernic: {})
+    monkeypatch.setattr(sa.psutil, 'disk_io_counters', lambda perdisk: {})
+    monkeypatch.setattr(sa, 'get_filesystem_usage', dict)
+    tracker = sa.CounterTracker()
+    assert sa.get_device_rates(tracker)['cpu_cores'] is None
+    assert sa.get_device_rates(tracker)['cpu_cores'] == [50.0]
+
+
+@pytest.mark.parametrize('window', ['-1', '5'])
+def test_rate_window_is_bounded(window):
+    with pytest.raises(SystemExit):
+        sa.parse_arguments(['--rate-window', window])
+
+
+def test_summarize_device_rates():
+    rates = {'cpu_cores': [10.0, 95.5, 3.0],
+             'disks': {'sda': {'busy_percent': 40.0}, 'sdb': {'busy_percent': float('nan')}},
+             'nics': {'eth0': {'errin_per_sec': 1.0, 'errout_per_sec': 0.0,
+                               'dropin_per_sec': 2.0, 'dropout_per_sec': 0.5}},
+             'filesystems': {}}
+    assert sa.summarize_device_rates(rates) == {
+        'cpu_core_max': 95.5, 'disk_busy_max': 40.0, 'nic_errors_per_sec': 3.5}
+    empty = {'cpu_cores': None, 'disks': {}, 'nics': {}, 'filesystems': {}}
+    assert set(sa.summarize_device_rates(empty).values()) == {None}
+
+
+def test_daemon_keeps_rate_summaries_not_device_tables():
+    threading.Timer(0.55, signal.raise_signal, (signal.SIGINT,)).start()
+    samples = list(sa.run_daemon(0.1, report_every=0, top_n=0, rates_every=2))
+    assert len(samples) >= 4
+    assert all('device_rates' not in sample for sample in samples)
+    # The first sweep only sets the baseline; the next one has rates.
+    assert samples[2]['cpu_core_max'] is not None
+    assert 'cpu_core_max' not in samples[1]
+
+
+def test_zero_rate_window_skips_numpy():
+    script = textwrap.dedent(f"""
+        import importlib.util, sys
+        spec = importlib.util.spec_from_file_location('sa', {str(sa.__file__)!r})
+        sa = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sa)
+        rates = sa.collect_device_rates({{'rate_window': 0}})
+        print(rates['cpu_cores'], bool(rates['filesystems']), 'numpy' in sys.modules)
+    """)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    assert output.stdout.split() == ['None', 'True', 'False']
@@ -0,0 +1,174 @@
+import asyncio
+import contextlib
+import http.client
+import os
+import socket
+import threading
+import time
+import zlib
+
+import pytest
+
+import system_analyzer as sa
+
+
+def sample(timestamp):
+    return {'timestamp': float(timestamp), 'cpu_usage': 1.0, 'memory_usage': 2.0,
+            'disk_usage': 3.0, 'bytes_sent': 4.0, 'bytes_recv': 5.0}
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.05)
+
+
+def spooled_timestamps(spool_dir):
+    timestamps = []
+    for name in ('replay.bin', 'spool.bin'):
+        path = os.path.join(spool_dir, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                frames, _ = sa.split_frames(f.read())
+            for frame in frames:
+                timestamps += [record[0] for record in
+                               sa.decode_batch(frame[sa.FRAME_HEADER.size:])[1]]
+    return timestamps
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = sa.FleetAggregator(refresh_interval=0)
+    received = []
+    ingest = aggregator.ingest
+    aggregator.ingest = lambda host, records: (received.extend(r[0] for r in records),
+                                               ingest(host, records))
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    ports = {}
+
+    def on_ready(ingest_server, http_server):
+        ports['ingest'] = ingest_server.sockets[0].getsockname()[1]
+        ports['http'] = http_server.sockets[0].getsockname()[1]
+        ready.set()
+
+    task = loop.create_task(aggregator.serve('127.0.0.1', 0, 0, ready=on_ready))
+
+    def run():
+        with contextlib.suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    yield aggregator, ports, received
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+    loop.close()
+
+
+def test_batch_round_trip():
+    records = [[1.5, 1, 2, 3, 4, 5], [2.5, 6, 7, 8, 9, 10]]
+    frame = sa.encode_batch('host-a', records)
+    host, decoded = sa.decode_batch(frame[sa.FRAME_HEADER.size:])
+    assert host == 'host-a'
+    assert [list(record) for record in decoded] == records
+
+
+def test_split_frames_leaves_out_a_torn_frame():
+    frames = [sa.encode_batch('h', [[i, 0, 0, 0, 0, 0]]) for i in range(3)]
+    data = b''.join(frames)
+    assert sa.split_frames(data + frames[0][:7]) == (frames, len(data))
+
+
+def test_ship_to_aggregator_and_scrape(aggregator, tmp_path):
+    agg, ports, received = aggregator
+    shipper = sa.FleetShipper(('127.0.0.1', ports['ingest']), str(tmp_path), batch_size=2,
+                              host='agent "1"')
+    for timestamp in range(5):
+        shipper.add(sample(timestamp))
+    shipper.close()
+    wait_for(lambda: len(received) == 5)
+    assert received == [0, 1, 2, 3, 4]
+
+    connection = http.client.HTTPConnection('127.0.0.1', ports['http'], timeout=5)
+    connection.request('GET', '/metrics')
+    body = connection.getresponse().read().decode()
+    assert 'system_analyzer_cpu_usage{host="agent \\"1\\""} 1.0' in body
+    assert 'system_analyzer_samples_received_total{host="agent \\"1\\""} 5' in body
+
+
+def test_malformed_frame_is_rejected(aggregator):
+    _, ports, _ = aggregator
+    with socket.create_connection(('127.0.0.1', ports['ingest']), timeout=5) as sock:
+        sock.sendall(sa.FRAME_HEADER.pack(5) + b'bogus')
+        assert sock.recv(1) == sa.FRAME_NAK
+
+
+def test_spool_keeps_order_and_replays(aggregator, tmp_path):
+    shipper = sa.FleetShipper(('127.0.0.1', closed_port()), str(tmp_path), batch_size=1,
+                              max_pending=2)
+    for timestamp in range(10):
+        shipper.add(sample(timestamp))
+        time.sleep(0.01)
+    shipper.close(timeout=5)
+    assert not shipper.thread.is_alive()
+    assert spooled_timestamps(str(tmp_path)) == list(range(10))
+
+    _, ports, received = aggregator
+    shipper = sa.FleetShipper(('127.0.0.1', ports['ingest']), str(tmp_path), batch_size=1)
+    shipper.add(sample(10))
+    wait_for(lambda: len(received) == 11)
+    shipper.close()
+    assert received == list(range(11))
+    assert spooled_timestamps(str(tmp_path)) == []
+
+
+def test_replay_resumes_after_acked_prefix(aggregator, tmp_path):
+    frames = [sa.encode_batch('h', [[i, 0, 0, 0, 0, 0]]) for i in range(3)]
+    (tmp_path / 'replay.bin').write_bytes(b''.join(frames))
+    (tmp_path / 'replay.pos').write_text(str(len(frames[0])))
+    _, ports, received = aggregator
+    shipper = sa.FleetShipper(('127.0.0.1', ports['ingest']), str(tmp_path))
+    wait_for(lambda: len(received) == 2)
+    shipper.close()
+    assert received == [1, 2]
+    assert not (tmp_path / 'replay.bin').exists()
+    assert not (tmp_path / 'replay.pos').exists()
+
+
+def test_torn_spool_frame_is_cut_before_appending(aggregator, tmp_path):
+    frames = [sa.encode_batch('h', [[i, 0, 0, 0, 0, 0]]) for i in range(3)]
+    (tmp_path / 'spool.bin').write_bytes(frames[0] + frames[1][:10])
+    _, ports, received = aggregator
+    shipper = sa.FleetShipper(('127.0.0.1', closed_port()), str(tmp_path), batch_size=1,
+                              max_pending=1)
+    assert (tmp_path / 'spool.bin').read_bytes() == frames[0]
+    shipper.close(timeout=5)
+
+    shipper = sa.FleetShipper(('127.0.0.1', ports['ingest']), str(tmp_path), batch_size=1)
+    shipper.add(sample(2))
+    wait_for(lambda: len(received) == 2)
+    shipper.close()
+    assert received == [0, 2]
+
+
+def test_decompression_bomb_is_rejected(aggregator, monkeypatch):
+    monkeypatch.setattr(sa, 'MAX_BATCH_SIZE', 1024 * 1024)
+    bomb = zlib.compress(b'\0' * (8 * 1024 * 1024))
+    with pytest.raises(ValueError, match='expands beyond'):
+        sa.decode_batch(bomb)
+    with pytest.raises(ValueError, match='truncated'):
+        sa.decode_batch(zlib.compress(b'x' * 100)[:-4])
+    _, ports, received = aggregator
+    with socket.create_connection(('127.0.0.1', ports['ingest']), timeout=5) as sock:
+        sock.sendall(sa.FRAME_HEADER.pack(len(bomb)) + bomb)
+        assert sock.recv(1) == sa.FRAME_NAK
+    assert received == []
@@ -0,0 +1,124 @@
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+
+import system_analyzer as sa
+
+
+class OkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_probe_reuses_keep_alive_connection(http_server):
+    results = sa.probe_connection(http_server, 5, timeout=5)
+    assert len(results) == 5
+    assert all(r['error'] is None for r in results)
+    # Only the first request opens a connection.
+    assert results[0]['connect_ms'] is not None
+    assert all(r['connect_ms'] is None for r in results[1:])
+
+
+def test_connect_failure_ends_worker_without_retrying(monkeypatch):
+    attempts = []
+    original = sa.http.client.HTTPConnection.connect
+
+    def counting_connect(self):
+        attempts.append(1)
+        return original(self)
+
+    monkeypatch.setattr(sa.http.client.HTTPConnection, 'connect', counting_connect)
+    results = sa.probe_connection(f"http://127.0.0.1:{closed_port()}/", 10, timeout=5)
+    assert len(results) == 10
+    assert all(r['error'] for r in results)
+    assert len(attempts) == 1
+
+
+def test_probe_targets_reports_per_target_errors(http_server):
+    dead = f"http://127.0.0.1:{closed_port()}"
+    malformed = "http://127.0.0.1:notaport"
+    results = sa.probe_targets([http_server, dead, malformed],
+                               requests_per_target=4, concurrency=2, timeout=5)
+    healthy = results[http_server]
+    assert healthy['requests'] == 4 and healthy['errors'] == 0
+    assert healthy['ttfb_ms']['p50'] > 0
+    for url in (dead, malformed):
+        assert results[url]['requests'] == 4
+        assert results[url]['error_rate'] == 1.0
+    assert 'notaport' in results[malformed]['last_error']
+
+
+@pytest.fixture
+def silent_port():
+    # Connections complete in the listen backlog but are never answered.
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        s.listen(512)
+        yield s.getsockname()[1]
+
+
+def test_timeout_ends_worker(silent_port):
+    started = time.monotonic()
+    results = sa.probe_connection(f"http://127.0.0.1:{silent_port}/", 5, timeout=0.3)
+    assert time.monotonic() - started < 1
+    assert len(results) == 5
+    assert all(r['error'] for r in results)
+
+
+def test_max_time_bounds_a_slow_worker(monkeypatch):
+    class SlowHandler(OkHandler):
+        def do_GET(self):
+            time.sleep(0.2)
+            super().do_GET()
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        started = time.monotonic()
+        results = sa.probe_connection(f"http://127.0.0.1:{server.server_address[1]}/", 10,
+                                      timeout=5, max_time=0.5)
+        assert time.monotonic() - started < 1
+        assert len(results) == 10
+        assert 0 < sum(r['error'] is None for r in results) < 10
+        assert results[-1]['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_silent_targets_do_not_stall_healthy_ones(http_server, silent_port):
+    # 80 silent targets need more connections than there are workers.
+    targets = [f"http://127.0.0.1:{silent_port}/?{i}" for i in range(80)] + [http_server]
+    started = time.monotonic()
+    results = sa.probe_targets(targets, requests_per_target=4, concurrency=4, timeout=0.5)
+    assert time.monotonic() - started < 3
+    assert results[http_server]['errors'] == 0
+    assert results[targets[0]]['error_rate'] == 1.0
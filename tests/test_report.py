@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+import pytest
+
+import system_analyzer as sa
+
+BASE = 1_700_006_400.0
+
+
+def write_store(directory, count, cpu):
+    store = sa.SampleStore(directory)
+    for i in range(count):
+        store.append({'timestamp': BASE + i, 'cpu_usage': cpu(i), 'memory_usage': 50.0,
+                      'disk_usage': 10.0, 'bytes_sent': 1000.0 * i, 'bytes_recv': 0.0})
+    store.close()
+
+
+def test_metric_bins_are_cached_and_read_only():
+    assert sa.metric_bins('cpu_usage') is sa.metric_bins('cpu_usage')
+    assert len(sa.metric_bins('cpu_usage')) == 1001
+    assert len(sa.metric_bins('cpu_usage', coarse=True)) == 101
+    with pytest.raises(ValueError):
+        sa.metric_bins('bytes_sent_per_sec')[0] = 1.0
+
+
+def test_coarse_and_fine_bin_indices_agree():
+    values = np.array([0.0, 0.05, 37.26, 99.99, 100.0, 150.0])
+    fine = sa.bin_indices('cpu_usage', values)
+    coarse = sa.bin_indices('cpu_usage', values, coarse=True)
+    assert coarse.tolist() == (fine // 10).tolist()
+    rates = np.array([0.5, 1.0, 12345.0, 1e15])
+    assert sa.bin_indices('bytes_sent_per_sec', rates, coarse=True).tolist() == [0, 1, 41, 120]
+
+
+def test_report_per_bucket_and_overall(tmp_path):
+    # Three 60-sample buckets; the last one runs hot.
+    write_store(str(tmp_path), 180, lambda i: 90.0 if i >= 120 else 10.0 + i % 10)
+    report = sa.build_history_report(str(tmp_path), BASE, BASE + 180, 60)
+    cpu = report['cpu_usage']
+    assert cpu['overall']['samples'] == 180
+    assert cpu['overall']['max'] == 90.0
+    assert [bucket['samples'] for bucket in cpu['buckets']] == [60, 60, 60]
+    assert cpu['buckets'][0]['mean'] == pytest.approx(14.5)
+    # Coarse per-bucket percentiles stay within one bin of the exact value.
+    assert cpu['buckets'][0]['p50'] == pytest.approx(14.5, abs=1)
+    assert cpu['buckets'][2]['p99'] == 90.0
+    rate = report['bytes_sent_per_sec']
+    assert rate['overall']['p50'] == pytest.approx(1000, rel=0.03)
+    assert rate['buckets'][1]['p95'] == pytest.approx(1000, rel=0.3)
+
+
+def test_report_rejects_too_many_buckets(tmp_path):
+    write_store(str(tmp_path), 10, lambda i: 1.0)
+    with pytest.raises(ValueError, match='memory budget'):
+        sa.build_history_report(str(tmp_path), BASE, BASE + 3 * 86400, 60,
+                                memory_budget=8 * 1024 * 1024)
+    report = sa.build_history_report(str(tmp_path), BASE, BASE + 3 * 86400, 60)
+    assert report['cpu_usage']['overall']['samples'] == 10
+
+
+def test_flag_anomalies():
+    buckets = [{'mean': value} for value in (10, 11, 10, 12, 11, 10, 95)]
+    sa.flag_anomalies(buckets)
+    assert [bucket['anomaly'] for bucket in buckets[:-1]] == [[]] * 6
+    assert 'mad' in buckets[-1]['anomaly']
+
+
+def test_log_alerts_are_counted_not_sampled(tmp_path, caplog):
+    write_store(str(tmp_path / 'store'), 120, lambda i: 10.0)
+    log = tmp_path / 'analyzer.log'
+    stamp = lambda offset: time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(BASE + offset))
+    log.write_text(f"{stamp(5)},123:WARNING:Alert high_cpu raised: cpu_usage = 95.0\n"
+                   f"{stamp(70)},456:WARNING:Alert high_cpu raised: cpu_usage = 97.5\n"
+                   f"{stamp(500)},789:WARNING:Alert high_cpu raised: cpu_usage = 99.0\n")
+    report = sa.build_history_report(str(tmp_path / 'store'), BASE, BASE + 120, 60,
+                                     log_files=[str(log), str(tmp_path / 'missing.log')])
+    cpu = report['cpu_usage']
+    assert cpu['overall']['samples'] == 120
+    assert cpu['overall']['max'] == 10.0
+    assert cpu['overall']['alerts'] == 2
+    assert [bucket['alerts'] for bucket in cpu['buckets']] == [1, 1]
+    assert 'Skipping' in caplog.text and 'missing.log' in caplog.text
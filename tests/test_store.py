@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+import system_analyzer as sa
+
+DAY = 86400
+# Aligned to a day boundary so tests can place samples on either side of it.
+BASE = 1_700_006_400.0
+
+
+def sample(timestamp, value):
+    return {'timestamp': timestamp, 'cpu_usage': value, 'memory_usage': value + 1,
+            'disk_usage': value + 2, 'bytes_sent': value * 10, 'bytes_recv': value * 20}
+
+
+def fill(store, start, count, step=1.0):
+    for i in range(count):
+        store.append(sample(start + i * step, float(i)))
+
+
+def test_raw_round_trip_across_segments(tmp_path):
+    store = sa.SampleStore(str(tmp_path))
+    # Two samples before the day boundary, two after: two raw segments.
+    for offset in (-2, -1, 0, 1):
+        store.append(sample(BASE + offset, float(offset)))
+    store.close()
+    assert len(sa.list_segments(str(tmp_path), 'raw')) == 2
+    rows = list(store.query(BASE - DAY, BASE + DAY))
+    assert [row[0] for row in rows] == [BASE - 2, BASE - 1, BASE, BASE + 1]
+    assert rows[0][1:] == (-2.0, -1.0, 0.0, -20.0, -40.0)
+    assert [row[0] for row in store.query(BASE - 1, BASE + 1)] == [BASE - 1, BASE]
+
+
+def test_out_of_order_sample_is_dropped(tmp_path):
+    store = sa.SampleStore(str(tmp_path))
+    assert store.append(sample(BASE + 10, 1.0))
+    assert not store.append(sample(BASE + 10, 2.0))
+    assert not store.append(sample(BASE + 5, 3.0))
+    store.close()
+    assert len(list(store.query(BASE, BASE + DAY))) == 1
+
+
+def test_minute_rollup(tmp_path):
+    store = sa.SampleStore(str(tmp_path))
+    fill(store, BASE, 121)
+    store.close()
+    rows = list(store.query(BASE, BASE + DAY, '1m'))
+    # The third minute holds one sample and is still open.
+    assert [row[0] for row in rows] == [BASE, BASE + 60]
+    fields = sa.store_fields('1m')
+    first = dict(zip(fields, rows[0]))
+    assert first['count'] == 60
+    assert first['cpu_usage_min'] == 0.0
+    assert first['cpu_usage_max'] == 59.0
+    assert first['cpu_usage_mean'] == sum(range(60)) / 60
+
+
+def test_reopen_recovers_open_rollup_buckets(tmp_path):
+    store = sa.SampleStore(str(tmp_path))
+    fill(store, BASE, 90)
+    store.close()
+
+    reopened = sa.SampleStore(str(tmp_path))
+    assert reopened.last_timestamp == BASE + 89
+    for i in range(90, 181):
+        reopened.append(sample(BASE + i, float(i)))
+    reopened.close()
+
+    rows = list(reopened.query(BASE, BASE + DAY, '1m'))
+    fields = sa.store_fields('1m')
+    # Each completed minute is written exactly once, including the one that
+    # straddled the restart, with all of its samples.
+    assert [row[0] for row in rows] == [BASE, BASE + 60, BASE + 120]
+    straddling = dict(zip(fields, rows[1]))
+    assert straddling['count'] == 60
+    assert straddling['cpu_usage_min'] == 60.0
+    assert straddling['cpu_usage_max'] == 119.0
+
+
+def test_torn_record_is_truncated_on_reopen(tmp_path):
+    store = sa.SampleStore(str(tmp_path))
+    fill(store, BASE, 3)
+    store.close()
+    (_, path), = sa.list_segments(str(tmp_path), 'raw')
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * 5)
+
+    reopened = sa.SampleStore(str(tmp_path))
+    reopened.append(sample(BASE + 3, 3.0))
+    reopened.close()
+    assert os.path.getsize(path) % sa.record_struct('raw').size == 0
+    assert [row[0] for row in reopened.query(BASE, BASE + DAY)] == [BASE + i for i in range(4)]
+
+
+def test_store_has_a_single_writer(tmp_path):
+    store = sa.SampleStore(str(tmp_path))
+    with pytest.raises(OSError, match='in use'):
+        sa.SampleStore(str(tmp_path), wait=False)
+    store.close()
+    sa.SampleStore(str(tmp_path), wait=False).close()
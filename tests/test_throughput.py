@@ -0,0 +1,56 @@
+import socket
+import time
+
+import pytest
+
+import system_analyzer as sa
+
+
+@pytest.fixture
+def server():
+    server, _ = sa.start_throughput_server(host='127.0.0.1', port=0, buffer_size=16 * 1024)
+    yield server.getsockname()[1]
+    server.close()
+
+
+def test_loopback_download_and_upload(server):
+    results = sa.run_throughput_test('127.0.0.1', server, streams=2, duration=0.5,
+                                     buffer_size=16 * 1024, report_interval=0.1)
+    for direction in ('download', 'upload'):
+        summary = results[direction]
+        assert summary['aggregate_mbps'] > 0
+        assert len(summary['streams_mbps']) == 2
+        assert summary['intervals_mbps']
+
+
+def test_unreachable_server_fails_the_direction():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    results = sa.run_throughput_test('127.0.0.1', port, streams=2, duration=0.2,
+                                     directions=('download',))
+    assert results == {'download': None}
+
+
+def test_silent_client_is_dropped(server, monkeypatch):
+    monkeypatch.setattr(sa, 'THROUGHPUT_TIMEOUT', 0.2)
+    with socket.create_connection(('127.0.0.1', server), timeout=5) as sock:
+        started = time.monotonic()
+        assert sock.recv(1) == b''
+        assert time.monotonic() - started < 3
+
+
+def test_duration_is_capped(server, monkeypatch):
+    monkeypatch.setattr(sa, 'THROUGHPUT_MAX_DURATION', 0.3)
+    with socket.create_connection(('127.0.0.1', server), timeout=5) as sock:
+        sock.sendall(sa.THROUGHPUT_HEADER.pack(b'D', 3600))
+        started = time.monotonic()
+        while sock.recv(65536):
+            pass
+        assert time.monotonic() - started < 3
+
+
+@pytest.mark.parametrize('argv', [['--streams', '0'], ['--duration', '61s'], ['--duration', '0.5s', '--streams', '-2']])
+def test_invalid_throughput_arguments_are_rejected(argv):
+    with pytest.raises(SystemExit):
+        sa.parse_arguments(['--throughput', '127.0.0.1'] + argv)